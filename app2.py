@@ -1,234 +1,47 @@
 import streamlit as st
-import spacy
-from spacy.matcher import Matcher
 import pandas as pd
-from sklearn.feature_extraction.text import CountVectorizer
-from sklearn.naive_bayes import MultinomialNB
-from sklearn.pipeline import make_pipeline
-import re
+
+from engine import SOLVERS, ContextRosterEngine
+from history import RosterHistory
+from matching import WEEKDAYS
+from metrics import PROFILERS, profiling
+from roster_view import render_roster
 
 # --- PAGE CONFIG ---
 st.set_page_config(page_title="AI Scheduler Enterprise", page_icon="📅", layout="wide")
 
 # --- 1. SETUP & ML TRAINING ---
-@st.cache_resource
+# Parsing (compound-line splitting, name context, time intervals) and the
+# scheduling algorithm live in engine.py (ContextRosterEngine).
+# Not st.cache_resource: the engine already holds the models per process and
+# swaps in corrected classifiers, which this picks up on the next rerun.
 def load_resources():
-    # 1. Load NLP Model
-    try:
-        nlp = spacy.load("en_core_web_sm")
-    except OSError:
-        import spacy.cli
-        spacy.cli.download("en_core_web_sm")
-        nlp = spacy.load("en_core_web_sm")
-    
-    matcher = Matcher(nlp.vocab)
-    
-    # 2. IMPROVED TIME PATTERN
-    # Captures "9-5", "9:00-5:00", "12 to 8"
-    pattern_time = [
-        [{"IS_DIGIT": True}, {"IS_PUNCT": True}, {"IS_DIGIT": True}],
-        [{"IS_DIGIT": True}, {"LOWER": "to"}, {"IS_DIGIT": True}]
-    ]
-    matcher.add("TIME", pattern_time)
-
-    # 3. Train Classifier
-    training_data = [
-        ("I can work Saturday", "AVAILABILITY"), ("Bob is available Monday", "AVAILABILITY"),
-        ("Sam cannot work", "UNAVAILABILITY"), ("I am sick", "UNAVAILABILITY"),
-        ("Need two cashiers", "SHIFT_REQUEST"), ("We need stockers", "SHIFT_REQUEST"),
-        ("Sam prefers mornings", "PREFERENCE"), ("I prefer evening shifts", "PREFERENCE")
-    ]
-    # (Reduced list for brevity, but model logic works same as before)
-    sentences, labels = zip(*training_data)
-    model = make_pipeline(CountVectorizer(), MultinomialNB())
-    model.fit(sentences, labels)
-    
-    return nlp, matcher, model
-
-nlp, matcher, classifier = load_resources()
-
-# --- 2. INTELLIGENT PARSING LOGIC ---
-
-def normalize_role(role_text):
-    """Maps various words to standard roles"""
-    if not role_text: return "General"
-    
-    role_map = {
-        "stock": "Stock", "restock": "Stock", "inventory": "Stock",
-        "cashier": "Cashier", "register": "Cashier",
-        "supervisor": "Supervisor", "manager": "Supervisor",
-        "floor": "General", "help": "General", "general": "General"
-    }
-    
-    for key, val in role_map.items():
-        if key in role_text.lower():
-            return val
-    return "General"
-
-def extract_details(text, intent, last_person=None):
-    doc = nlp(text)
-    data = {"Name": None, "Day": None, "Time": "Any", "Role": "General"}
-    
-    # 1. Extract Name (Person)
-    for ent in doc.ents:
-        if ent.label_ == "PERSON":
-            data["Name"] = ent.text
-    
-    # CONTEXT MEMORY: If no name found, assume it's the person from the previous clause
-    # Example: "Alice works Monday... and [Alice] works Wednesday..."
-    if data["Name"] is None and last_person and intent == "AVAILABILITY":
-        data["Name"] = last_person
-
-    # 2. Extract Date
-    for ent in doc.ents:
-        if ent.label_ == "DATE":
-            data["Day"] = ent.text
-            
-    # 3. Extract Time (Regex Matcher)
-    matches = matcher(doc)
-    for match_id, start, end in matches:
-        data["Time"] = doc[start:end].text
+    """The classifier and its artifact fingerprint and version (banner, correction form)"""
+    resources = ContextRosterEngine().resources
+    return resources.classifier, resources.fingerprint, resources.version
 
-    # 4. Extract Role (Keywords)
-    # We scan the text for role keywords directly to catch "floor", "supervisor"
-    text_lower = text.lower()
-    data["Role"] = normalize_role(text_lower)
-            
-    return data
+classifier, model_fingerprint, model_version = load_resources()
 
-def preprocess_lines(raw_text):
-    """
-    Splits compound sentences like 'Alice works Monday and Wednesday' 
-    into two separate processing lines.
-    """
-    processed_lines = []
-    
-    # Split by newlines first
-    base_lines = raw_text.split('\n')
-    
-    for line in base_lines:
-        if not line.strip(): continue
-        
-        # Split by " and " if it looks like a compound constraint
-        # Logic: If line has ' and ', replace it with a delimiter we can split on
-        # But be careful of names like "Bob and Sam"
-        
-        # Simple heuristic: Split on " and " only if the line is long
-        parts = re.split(r' and |; ', line)
-        
-        for part in parts:
-            if part.strip():
-                processed_lines.append(part.strip())
-                
-    return processed_lines
+def correct_intent():
+    """Applies the correction picked in the classification log (runs before the rerun)"""
+    line, intent = st.session_state.correct_line, st.session_state.correct_intent
+    version = ContextRosterEngine().correct_intents([(line, intent)])
+    st.session_state.corrected = f"Model v{version} classifies \"{line}\" as {intent}. Generate again to use it."
 
-# --- 3. ROBUST SCHEDULING ALGORITHM ---
-
-def generate_roster(raw_text):
-    lines = preprocess_lines(raw_text)
-    
-    employees = []
-    shifts = []
-    conflicts = []
-    
-    last_person_seen = None # Tracks context for "and Wednesday..." lines
-    
-    # --- PHASE 1: PARSING ---
-    for line in lines:
-        intent = classifier.predict([line])[0]
-        details = extract_details(line, intent, last_person_seen)
-        
-        # Update context
-        if details["Name"]: 
-            last_person_seen = details["Name"]
-
-        if intent == "UNAVAILABILITY":
-            name = details['Name'] or "Unknown"
-            conflicts.append(f"❌ **{name}** is unavailable ({line})")
-        
-        elif intent == "AVAILABILITY":
-            employees.append({
-                "Name": details["Name"],
-                "Day": details["Day"],
-                "Time": details["Time"],
-                "Role": details["Role"],
-                "Preference": None,
-                "Is_Assigned": False 
-            })
-            
-        elif intent == "PREFERENCE":
-            # Attach preference to relevant employee
-            target_name = details["Name"] or last_person_seen
-            if target_name:
-                for emp in employees:
-                    if emp["Name"] == target_name:
-                        emp["Preference"] = line
-
-        elif intent == "SHIFT_REQUEST":
-            count = 1
-            if "two" in line.lower() or "2" in line: count = 2
-            if "three" in line.lower() or "3" in line: count = 3
-            
-            for _ in range(count):
-                shifts.append({
-                    "Day": details["Day"], 
-                    "Time": details["Time"],
-                    "Role": details["Role"],
-                    "Assigned": None,
-                    "Source": "Explicit Request"
-                })
-
-    # --- PHASE 2: MATCHING (The Fix for Logic Bugs) ---
-    for shift in shifts:
-        for emp in employees:
-            if emp["Is_Assigned"]: continue
-            
-            # 1. Day Check (Loose matching for 'Sunday' in 'on Sunday')
-            s_day = str(shift["Day"]).lower()
-            e_day = str(emp["Day"]).lower()
-            day_match = (s_day in e_day) or (e_day in s_day) or (emp["Day"] is None)
-            
-            # 2. Role Check (Hierarchy: Specific > General)
-            # If request is General, anyone fits. If specific, need match.
-            role_match = False
-            if shift["Role"] == "General":
-                role_match = True
-            elif shift["Role"] == emp["Role"]:
-                role_match = True
-            elif emp["Role"] == "General":
-                # Maybe allow general staff to fill specific roles if needed? 
-                # For now, strict: General staff can't be Supervisor.
-                role_match = False 
-            
-            # 3. Time Check (Handle "Any" vs Specific)
-            time_match = False
-            if emp["Time"] == "Any":
-                time_match = True # "Available all day" matches any shift
-            elif shift["Time"] == "Any":
-                time_match = True
-            elif emp["Time"] == shift["Time"]:
-                time_match = True
-            
-            if day_match and role_match and time_match:
-                shift["Assigned"] = emp
-                emp["Is_Assigned"] = True
-                break 
+# Parsed lines and generated rosters persist across restarts (history.py)
+@st.cache_resource
+def load_history():
+    return RosterHistory()
 
-    # --- PHASE 3: INFERENCE ---
-    for emp in employees:
-        if not emp["Is_Assigned"]:
-            shifts.append({
-                "Day": emp["Day"] or "TBD",
-                "Time": emp["Time"],
-                "Role": emp["Role"],
-                "Assigned": emp,
-                "Source": "Inferred from Availability"
-            })
-            emp["Is_Assigned"] = True
+history = load_history()
 
-    return shifts, conflicts
+# --- 2. UI ---
+SOLVER_LABELS = {
+    "greedy": "Greedy (first fit)",
+    "matching": "Maximum coverage (Hopcroft-Karp)",
+    "preference": "Maximum coverage + preferences (min-cost)",
+}
 
-# --- 4. UI ---
 st.title("🤖 AI Scheduler (Fixed Logic)")
 
 # The client's complex scenario
@@ -245,34 +58,64 @@ We need a cashier on Friday 9-5.
 We need one more person for general help on Saturday 12-8.
 Sam has an exam on Friday and cannot work that day."""
 
-raw_text = st.text_area("Constraints:", value=default_text, height=300)
-
-if st.button("Generate Schedule"):
-    final_shifts, conflict_log = generate_roster(raw_text)
-    
-    st.subheader("1. Conflicts Detected")
-    for c in conflict_log:
-        st.error(c)
-
-    st.subheader("2. Final Schedule")
-    schedule_data = []
-    for s in final_shifts:
-        assignee = s['Assigned']['Name'] if s['Assigned'] else "UNFILLED"
-        pref = s['Assigned'].get('Preference', '') if s['Assigned'] else ''
-        
-        # Highlight Matches
-        status = "✅ Scheduled" if s['Assigned'] else "❌ Unfilled"
-        if "Inferred" in s['Source']: status = "ℹ️ Added (Availability)"
-        
-        schedule_data.append({
-            "Day": s['Day'],
-            "Time": s['Time'],
-            "Role": s['Role'],
-            "Employee": assignee,
-            "Preference Note": pref,
-            "Status": status
-        })
-        
-    df = pd.DataFrame(schedule_data)
-    # Sort for readability
-    st.table(df)
\ No newline at end of file
+roster_tab, history_tab = st.tabs(["Roster", "History"])
+
+with roster_tab:
+    if "corrected" in st.session_state:
+        st.success(st.session_state.pop("corrected"))
+    raw_text = st.text_area("Constraints:", value=default_text, height=300)
+    solver = st.selectbox("Assignment Solver:", SOLVERS, format_func=SOLVER_LABELS.get)
+    profile_mode = st.selectbox("Profile this run:", [None, *PROFILERS], format_func=lambda mode: mode or "Off")
+
+    if st.button("Generate Schedule"):
+        engine = ContextRosterEngine(solver, history=history)
+        with profiling(profile_mode) as profile:
+            final_shifts, conflict_log, _, intent_log = engine.generate_roster(raw_text)
+
+        counters = engine.metrics.counters
+        with st.expander("View Classification Logs"):
+            st.caption(
+                f"{counters.get('lines_templated', 0)} line(s) matched a template ({engine.template_hit_rate:.0%} skipped the model), "
+                f"{counters.get('lines_parsed', 0)} parsed by the model, {counters.get('cache_hits', 0)} reused from the parse cache, "
+                f"{counters.get('history_hits', 0)} loaded from history"
+            )
+            for line, pred, confidence in intent_log:
+                color = "green" if pred == "AVAILABILITY" else "red" if pred == "UNAVAILABILITY" else "blue"
+                st.markdown(f":{color}[**{pred}**] (Confidence: {confidence:.0%}): {line}")
+            with st.form("correction"):
+                line_col, intent_col = st.columns([3, 1])
+                line_col.selectbox("Misclassified line", [line for line, _, _ in intent_log], key="correct_line")
+                intent_col.selectbox("Correct intent", classifier.classes_.tolist(), key="correct_intent")
+                st.form_submit_button("Teach the model", on_click=correct_intent)
+
+        st.subheader("1. Conflicts Detected")
+        for c in conflict_log:
+            st.error(c)
+
+        st.subheader("2. Final Schedule")
+        with engine.metrics.phase("render"):
+            render_roster(engine.roster_table(final_shifts))
+
+        with st.expander("Performance"):
+            st.table(pd.DataFrame(engine.metrics.phase_rows()))
+            st.table(pd.DataFrame(engine.metrics.counter_rows()))
+        if profile.report:
+            with st.expander(f"Profile ({profile_mode})"):
+                st.code(profile.report)
+        engine.metrics.log(variant=engine.name, solver=solver)
+
+with history_tab:
+    st.caption(f"Rosters and parsed messages stored in {history.path}")
+    employee_col, day_col, role_col, since_col, until_col = st.columns(5)
+    employee = employee_col.text_input("Employee").strip() or None
+    day = day_col.selectbox("Day", [None, *WEEKDAYS], format_func=lambda day: day.title() if day else "Any")
+    role = role_col.text_input("Role").strip() or None
+    since = since_col.date_input("Generated on or after", value=None)
+    until = until_col.date_input("Generated before", value=None)
+
+    st.subheader("Shifts per Employee")
+    st.dataframe(pd.DataFrame(history.workload(day, role, since, until, variant="app2")), hide_index=True)
+    st.subheader("Stored Shifts")
+    st.dataframe(pd.DataFrame(history.shifts(employee, day, role, since, until, variant="app2")), hide_index=True)
+    st.subheader("Recent Rosters")
+    st.dataframe(pd.DataFrame(history.runs(variant="app2")), hide_index=True)
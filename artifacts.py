@@ -0,0 +1,233 @@
+import copy
+import glob
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# --- PERSISTED MODEL ARTIFACTS ---
+# The fitted classifier and the Matcher patterns are saved to one joblib file
+# named after a fingerprint of everything that went into them. Startup loads
+# that file; training only happens when the fingerprint changes. Manager
+# corrections are folded into the saved classifier with partial_fit, each
+# batch one version up, and replayed after a retrain. Training and every
+# read-correct-save run under a per-artifact file lock, so processes that
+# correct at the same time queue up instead of overwriting each other.
+
+SPACY_MODEL = os.environ.get("SCHEDULER_SPACY_MODEL", "en_core_web_sm")
+ARTIFACT_DIR = os.environ.get(
+    "SCHEDULER_ARTIFACT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".artifacts")
+)
+# Strict offline mode: never reach out to download anything
+OFFLINE = os.environ.get("SCHEDULER_OFFLINE", "").lower() in ("1", "true", "yes")
+# A corrected line counts up to this many times before the model gives in
+CORRECTION_MAX_WEIGHT = 16
+
+Artifact = namedtuple("Artifact", ["model", "matcher_patterns", "fingerprint", "version", "corrections"])
+
+
+class ModelUnavailableError(RuntimeError):
+    """The spaCy model is missing and offline mode forbids downloading it"""
+
+
+def load_spacy_model(name=SPACY_MODEL, offline=OFFLINE):
+    """Loads a spaCy model by package name or path, downloading it only when online"""
+    import spacy
+
+    try:
+        return spacy.load(name)
+    except OSError:
+        if offline:
+            raise ModelUnavailableError(
+                f"spaCy model {name!r} is not installed and SCHEDULER_OFFLINE is set. "
+                f"Install the package or point SCHEDULER_SPACY_MODEL at a local model directory."
+            ) from None
+        # Fallback: Download if not found (useful for local dev)
+        from spacy.cli import download
+        download(name)
+        return spacy.load(name)
+
+
+def fingerprint(training_data, matcher_patterns, model):
+    """Hash of the training set, Matcher patterns, pipeline config and sklearn version"""
+    import sklearn
+
+    payload = json.dumps(
+        {
+            "training_data": [list(pair) for pair in training_data],
+            "matcher_patterns": matcher_patterns,
+            "model": repr(model),
+            "sklearn": sklearn.__version__,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def artifact_path(name, model_fingerprint, artifact_dir=ARTIFACT_DIR):
+    return os.path.join(artifact_dir, f"{name}-{model_fingerprint[:16]}.joblib")
+
+
+def load_or_train(name, training_data, matcher_patterns, build_model, artifact_dir=ARTIFACT_DIR):
+    """
+    Returns the Artifact for this training set. build_model() must return an
+    unfitted estimator; it is only fitted when no artifact matches, and then
+    the corrections saved against the previous training set are replayed.
+    """
+    model = build_model()
+    model_fingerprint = fingerprint(training_data, matcher_patterns, model)
+    path = artifact_path(name, model_fingerprint, artifact_dir)
+
+    artifact = read_artifact(path)
+    if artifact is not None and artifact.fingerprint == model_fingerprint:
+        return artifact
+
+    with artifact_lock(name, model_fingerprint, artifact_dir):
+        artifact = read_artifact(path)  # Another process may have trained it while we waited
+        if artifact is not None and artifact.fingerprint == model_fingerprint:
+            return artifact
+        sentences, labels = zip(*training_data)
+        model.fit(sentences, labels)
+        version, corrections = previous_corrections(name, path, artifact_dir)
+        if corrections:
+            partial_fit(model, [c["text"] for c in corrections], [c["intent"] for c in corrections],
+                        [c["weight"] for c in corrections])
+        artifact = Artifact(model, matcher_patterns, model_fingerprint, version, corrections)
+        save_artifact(name, artifact, artifact_dir)
+    return artifact
+
+
+@contextmanager
+def artifact_lock(name, model_fingerprint, artifact_dir=ARTIFACT_DIR):
+    """
+    Exclusive lock, across processes, on one artifact: hold it from reading
+    the current version until the next one is saved. Where no lock file can
+    be created (read-only filesystem) nothing is saved either, so it is a no-op.
+    """
+    try:
+        os.makedirs(artifact_dir, exist_ok=True)
+        handle = open(artifact_path(name, model_fingerprint, artifact_dir) + ".lock", "a+b")
+    except OSError:
+        yield
+        return
+    with handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def read_artifact(path):
+    """The Artifact saved at `path`, or None if it is missing or unreadable"""
+    import joblib
+
+    if not os.path.exists(path): return None
+    try:
+        saved = joblib.load(path)
+        return Artifact(
+            saved["model"], saved["matcher_patterns"], saved["fingerprint"],
+            saved.get("version", 0), saved.get("corrections", []),
+        )
+    except Exception:
+        return None  # Unreadable or stale artifact: the caller retrains
+
+
+def artifact_stamp(path):
+    """Cheap change marker for the artifact at `path` (None if there is none)"""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def previous_corrections(name, path, artifact_dir=ARTIFACT_DIR):
+    """(version, corrections) of the newest other artifact of `name`, so a retrain keeps them"""
+    newest = (0, [])
+    for old in glob.glob(os.path.join(artifact_dir, f"{name}-*.joblib")):
+        if old == path: continue
+        artifact = read_artifact(old)
+        if artifact is not None and artifact.version > newest[0]:
+            newest = (artifact.version, artifact.corrections)
+    return newest
+
+
+def partial_fit(model, texts, labels, weights):
+    """Folds labelled texts into a fitted pipeline of a stateless vectorizer and an incremental classifier"""
+    model[-1].partial_fit(model[:-1].transform(texts), labels, sample_weight=weights)
+
+
+def correct(artifact, corrections, max_weight=CORRECTION_MAX_WEIGHT):
+    """
+    The next version of `artifact` with `corrections` ((text, intent) pairs)
+    folded in. Each text's weight doubles until the model agrees with it or
+    reaches max_weight; the original is left untouched for concurrent readers.
+    """
+    model = copy.deepcopy(artifact.model)
+    texts, labels = [text for text, _ in corrections], [intent for _, intent in corrections]
+    weights = [0] * len(texts)
+    todo = list(range(len(texts)))
+    while todo:
+        added = [max(weights[i], 1) for i in todo]
+        partial_fit(model, [texts[i] for i in todo], [labels[i] for i in todo], added)
+        for i, weight in zip(todo, added):
+            weights[i] += weight
+        predicted = model.predict([texts[i] for i in todo])
+        todo = [i for i, label in zip(todo, predicted) if label != labels[i] and weights[i] < max_weight]
+
+    version = artifact.version + 1
+    now = time.time()
+    logged = [
+        {"text": text, "intent": label, "weight": weight, "version": version, "at": now}
+        for text, label, weight in zip(texts, labels, weights)
+    ]
+    return artifact._replace(model=model, version=version, corrections=artifact.corrections + logged)
+
+
+def save_artifact(name, artifact, artifact_dir=ARTIFACT_DIR):
+    """
+    Writes the artifact atomically, replacing the previous version of the
+    same fingerprint. Call it under artifact_lock: temporary files of this
+    fingerprint that a crashed writer left behind are removed. Artifacts of
+    other fingerprints are kept, since another process may still serve them.
+    """
+    import joblib
+
+    path = artifact_path(name, artifact.fingerprint, artifact_dir)
+    prefix = os.path.basename(path) + "."
+    try:
+        os.makedirs(artifact_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=artifact_dir, prefix=prefix, suffix=".tmp")
+    except OSError:
+        return None  # Read-only filesystem: keep serving the in-memory model
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            joblib.dump(artifact._asdict(), handle)
+        os.replace(tmp_path, path)
+    except OSError:
+        os.remove(tmp_path)
+        return None
+
+    for stale in glob.glob(os.path.join(artifact_dir, glob.escape(prefix) + "*.tmp")):
+        try:
+            os.remove(stale)
+        except OSError:
+            pass
+    return path
@@ -0,0 +1,238 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from artifacts import SPACY_MODEL, load_or_train, load_spacy_model
+from engine import ENGINES, SOLVERS, build_classifier
+from parse_cache import normalize_line
+from workload import generate_messages
+
+# --- BENCHMARK SUITE ---
+#     python benchmark.py --sizes 10 100 1000 10000 --output bench.json
+#     python benchmark.py --compare bench.json      # flag regressions
+# Times model load, the regex fast path, classification, spaCy extraction,
+# sorting, matching and inference separately for both variants, plus
+# throughput, per-message latency percentiles and peak memory. The parse
+# cache is off so every run does the full work.
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+PHASES = ["split", "templates", "classify", "extract", "sort", "store", "matching", "inference"]
+
+def percentile(samples, q):
+    """Linear-interpolated percentile (q in 0..100) of a non-empty list"""
+    ordered = sorted(samples)
+    position = (len(ordered) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def bench_model_load(engine_cls):
+    """Seconds to load spaCy, train the classifier and load its saved artifact"""
+    _, spacy_seconds = timed(load_spacy_model)
+    sentences, labels = zip(*engine_cls.training_data)
+    _, train_seconds = timed(build_classifier().fit, sentences, labels)
+    with tempfile.TemporaryDirectory() as artifact_dir:
+        args = (engine_cls.name, engine_cls.training_data, engine_cls.matcher_patterns(), build_classifier, artifact_dir)
+        load_or_train(*args)
+        _, artifact_seconds = timed(load_or_train, *args)
+    return {"spacy_load": spacy_seconds, "classifier_train": train_seconds, "artifact_load": artifact_seconds}
+
+def run_phases(engine, messages):
+    """One pass of generate_roster, phase by phase; returns {phase: seconds}, intents"""
+    seconds = {}
+    lines, seconds["split"] = timed(engine.split_lines, messages)
+    texts = [normalize_line(line) for line in lines]
+    unique = list(dict.fromkeys(texts))
+
+    entries, seconds["templates"] = timed(lambda: {text: engine.match_template(text) for text in unique})
+    missing = [text for text in unique if entries[text] is None]
+    (intents, confidences), seconds["classify"] = timed(engine.classify_lines, missing)
+    parsed, seconds["extract"] = timed(engine.parse_docs, missing, intents)
+    for text, intent, confidence, details in zip(missing, intents, confidences, parsed):
+        entries[text] = (intent, confidence, details)
+
+    def sort():
+        line_intents = [entries[text][0] for text in texts]
+        line_details = engine.resolve_context([dict(entries[text][2]) for text in texts], line_intents)
+        return engine.sort_lines(lines, line_intents, line_details)
+
+    from columnar import RosterStore
+
+    state, seconds["sort"] = timed(sort)
+    store, seconds["store"] = timed(RosterStore, state.shifts, state.employees, state.unavailable)
+    _, seconds["matching"] = timed(engine.match, store)
+    _, seconds["inference"] = timed(engine.infer, store)
+    return seconds, [entries[text][0] for text in texts], lines
+
+def bench_variant(engine_cls, size, args):
+    corpus = list(generate_messages(size, args.seed))
+    messages = [record["message"] for record in corpus]
+    make_engine = lambda: engine_cls(
+        args.solver, parse_cache=None, processes=args.processes, use_templates=args.templates,
+    )
+    make_engine().resources  # models loaded before anything is timed
+
+    runs = []
+    for _ in range(args.repeat):
+        phases, intents, lines = run_phases(make_engine(), messages)
+        runs.append(phases)
+    phases = {phase: statistics.median(run[phase] for run in runs) for phase in PHASES}
+
+    totals = []
+    for _ in range(args.repeat):
+        engine = make_engine()
+        _, seconds = timed(engine.generate_roster, messages)
+        totals.append(seconds)
+    total = statistics.median(totals)
+
+    latencies = []
+    for message in messages[:args.latency_samples]:
+        _, seconds = timed(make_engine().generate_roster, [message])
+        latencies.append(seconds * 1000)
+
+    tracemalloc.start()
+    engine = make_engine()
+    engine.generate_roster(messages)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Intent accuracy only makes sense where a message is one line
+    labelled = [record["intent"] for record in corpus] if len(lines) == len(corpus) else None
+    return {
+        "variant": engine_cls.name,
+        "lines": size,
+        "processed_lines": len(lines),
+        "phases_seconds": phases,
+        "total_seconds": total,
+        "throughput_lines_per_second": size / total if total else None,
+        "latency_ms": {f"p{q}": percentile(latencies, q) for q in (50, 90, 99)} if latencies else None,
+        "peak_traced_memory_mb": peak / 1e6,
+        "template_hit_rate": engine.template_hit_rate,
+        "intent_accuracy": (
+            sum(got == want for got, want in zip(intents, labelled)) / len(labelled) if labelled else None
+        ),
+    }
+
+def environment():
+    import numpy, sklearn, spacy
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "spacy": spacy.__version__, "spacy_model": SPACY_MODEL,
+        "sklearn": sklearn.__version__, "numpy": numpy.__version__,
+    }
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 1e6
+
+
+# --- REPORTING ---
+def summarize(report, handle=sys.stdout):
+    for variant, load in report["model_load_seconds"].items():
+        print(f"{variant}: " + ", ".join(f"{phase} {seconds * 1000:.0f} ms" for phase, seconds in load.items()), file=handle)
+    print(f"{'variant':8}{'lines':>8}{'total s':>10}{'lines/s':>11}{'p50 ms':>9}{'p99 ms':>9}{'peak MB':>9}{'templ.':>8}  slowest phases", file=handle)
+    for result in report["results"]:
+        latency = result["latency_ms"] or {}
+        slowest = sorted(result["phases_seconds"].items(), key=lambda item: -item[1])[:3]
+        print(
+            f"{result['variant']:8}{result['lines']:>8}{result['total_seconds']:>10.3f}"
+            f"{result['throughput_lines_per_second'] or 0:>11.0f}{latency.get('p50', 0):>9.2f}{latency.get('p99', 0):>9.2f}"
+            f"{result['peak_traced_memory_mb']:>9.1f}{result['template_hit_rate']:>8.0%}  "
+            + ", ".join(f"{phase} {seconds:.3f}s" for phase, seconds in slowest),
+            file=handle,
+        )
+
+def compare(report, baseline, tolerance):
+    """Lines describing every timing more than `tolerance` slower than the baseline"""
+    previous = {(result["variant"], result["lines"]): result for result in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        before = previous.get((result["variant"], result["lines"]))
+        if before is None: continue
+        pairs = [("total", before["total_seconds"], result["total_seconds"])]
+        pairs += [(phase, before["phases_seconds"].get(phase), seconds) for phase, seconds in result["phases_seconds"].items()]
+        for label, old, new in pairs:
+            # Sub-millisecond phases are all noise
+            if old and new > old * (1 + tolerance) and new - old > 0.001:
+                regressions.append(f"{result['variant']} {result['lines']} lines {label}: {old:.4f}s -> {new:.4f}s (+{new / old - 1:.0%})")
+    return regressions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark the scheduling pipeline on synthetic corpora.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="corpus sizes in lines")
+    parser.add_argument("--variants", nargs="+", choices=sorted(ENGINES), default=sorted(ENGINES))
+    parser.add_argument("--solver", choices=SOLVERS, default="greedy")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per size; medians are reported")
+    parser.add_argument("--latency-samples", type=int, default=200, help="single-message runs for latency percentiles")
+    parser.add_argument("--processes", type=int, default=1, help="parse worker processes (default: 1)")
+    parser.add_argument("--no-templates", dest="templates", action="store_false", help="disable the regex fast path")
+    parser.add_argument("--output", "-o", default="benchmark_results.json", help="JSON results path")
+    parser.add_argument("--compare", help="earlier results JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown vs --compare (default: 0.2)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    report = {
+        "environment": environment(),
+        "settings": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "model_load_seconds": {},
+        "results": [],
+    }
+    for variant in args.variants:
+        engine_cls = ENGINES[variant]
+        report["model_load_seconds"][variant] = bench_model_load(engine_cls)
+        for size in args.sizes:
+            report["results"].append(bench_variant(engine_cls, size, args))
+    report["peak_rss_mb"] = peak_rss_mb()
+
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+    summarize(report)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            regressions = compare(report, json.load(handle), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
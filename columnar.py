@@ -0,0 +1,538 @@
+from collections.abc import MutableMapping, Sequence
+from itertools import islice, repeat
+
+import numpy as np
+
+from intervals import IntervalIndex
+from matching import SOLVERS, WILDCARD, normalize_day, normalize_role, role_fillers, solve_assignment
+
+# --- COLUMNAR ROSTER STORE ---
+# Employees and shifts as parallel NumPy columns instead of lists of dicts.
+# Repeated strings (days, roles, times, names, preferences) become int32 codes
+# into vocabularies shared by both tables, intervals become minute bounds,
+# Is_Assigned a bool array and Assigned a row number into the employees.
+# The matching phase compares each distinct shift profile with the day/role
+# buckets of employees that can serve it; the dict-shaped records callers
+# expect are views over the columns.
+
+CATEGORY, INTERVAL, FLAG, REFERENCE, OBJECT = "category", "interval", "flag", "reference", "object"
+
+EMPLOYEE_SCHEMA = {
+    "Name": CATEGORY, "Day": CATEGORY, "Time": CATEGORY, "Interval": INTERVAL,
+    "Role": CATEGORY, "Preference": CATEGORY, "Is_Assigned": FLAG,
+}
+SHIFT_SCHEMA = {
+    "Day": CATEGORY, "Time": CATEGORY, "Interval": INTERVAL, "Role": CATEGORY,
+    "Assigned": REFERENCE, "Source": CATEGORY,
+}
+NO_TIME = -1       # Interval bound of a record without a parsed interval
+EXTEND_BATCH = 4096
+
+
+class Vocabulary:
+    """Distinct values of a field and their int32 codes, in first-seen order"""
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def __len__(self):
+        return len(self.values)
+
+    def code(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def find(self, value):
+        """Code of `value`, or None if it never occurred"""
+        return self._codes.get(value)
+
+    def recode(self, key, keys):
+        """Array mapping each code here to keys.code(key(value))"""
+        return np.array([keys.code(key(value)) for value in self.values], dtype=np.int32)
+
+
+class RecordView(MutableMapping):
+    """One row of a Table, read and written like the dict it replaces"""
+    __slots__ = ("_table", "_row")
+
+    def __init__(self, table, row):
+        self._table = table
+        self._row = row
+
+    def __getitem__(self, field):
+        return self._table.get(self._row, field)
+
+    def __setitem__(self, field, value):
+        self._table.set(self._row, field, value)
+
+    def __delitem__(self, field):
+        raise TypeError("Fields of a columnar record cannot be removed")
+
+    def __iter__(self):
+        return iter(self._table.fields or ())
+
+    def __len__(self):
+        return len(self._table.fields or ())
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class Table(Sequence):
+    """
+    Records of one kind stored column by column. The fields are those of the
+    first record added; indexing returns RecordViews.
+    """
+
+    def __init__(self, schema, vocabularies, target=None):
+        self.schema = schema
+        self.vocabularies = vocabularies  # field -> Vocabulary, shared between tables
+        self.target = target              # Table that REFERENCE fields point into
+        self.fields = None
+        self.kinds = {}
+        self._columns = {}
+        self._size = 0
+        self._capacity = 0
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [RecordView(self, i) for i in range(*row.indices(self._size))]
+        if row < 0: row += self._size
+        if not 0 <= row < self._size:
+            raise IndexError("Table index out of range")
+        return RecordView(self, row)
+
+    def _define(self, fields):
+        self.fields = list(fields)
+        self.kinds = {field: self.schema.get(field, OBJECT) for field in self.fields}
+        for field, kind in self.kinds.items():
+            if kind == OBJECT:
+                self._columns[field] = []
+            else:
+                self._columns[field] = self._empty(kind, 0)
+            if kind == CATEGORY and field not in self.vocabularies:
+                self.vocabularies[field] = Vocabulary()
+
+    @staticmethod
+    def _empty(kind, size):
+        if kind == INTERVAL: return np.full((size, 2), NO_TIME, dtype=np.int32)
+        if kind == FLAG: return np.zeros(size, dtype=bool)
+        return np.full(size, -1, dtype=np.int32)   # CATEGORY codes, REFERENCE rows
+
+    def _reserve(self, size):
+        if size <= self._capacity: return
+        capacity = max(size, 2 * self._capacity, 16)
+        for field, kind in self.kinds.items():
+            if kind != OBJECT:
+                column = self._empty(kind, capacity)
+                column[:self._size] = self._columns[field][:self._size]
+                self._columns[field] = column
+        self._capacity = capacity
+
+    def _encode(self, field, kind, value):
+        if kind == CATEGORY:
+            return self.vocabularies[field].code(value)
+        if kind == INTERVAL:
+            return (NO_TIME, NO_TIME) if value is None else value
+        if kind == FLAG:
+            return bool(value)
+        if kind == REFERENCE:
+            if value is None: return -1
+            if isinstance(value, RecordView) and value._table is self.target:
+                return value._row
+            raise TypeError(f"{field} must be a record of the referenced table, got {type(value).__name__}")
+        return value
+
+    def extend(self, records):
+        """Appends records (any iterable of mappings), a batch at a time"""
+        records = iter(records)
+        while True:
+            batch = list(islice(records, EXTEND_BATCH))
+            if not batch: return
+            if self.fields is None:
+                self._define(batch[0])
+            start, end = self._size, self._size + len(batch)
+            self._reserve(end)
+            for field, kind in self.kinds.items():
+                values = [self._encode(field, kind, record.get(field)) for record in batch]
+                if kind == OBJECT:
+                    self._columns[field].extend(values)
+                else:
+                    self._columns[field][start:end] = values
+            self._size = end
+
+    def append(self, record):
+        self.extend([record])
+
+    def get(self, row, field):
+        kind = self.kinds.get(field)
+        if kind is None:
+            raise KeyError(field)
+        value = self._columns[field][row]
+        if kind == CATEGORY:
+            return self.vocabularies[field].values[value]
+        if kind == INTERVAL:
+            return None if value[0] == NO_TIME else (int(value[0]), int(value[1]))
+        if kind == FLAG:
+            return bool(value)
+        if kind == REFERENCE:
+            return None if value < 0 else RecordView(self.target, int(value))
+        return value
+
+    def set(self, row, field, value):
+        """Writes `value` to `field` of a row, or of every row in a list of rows"""
+        kind = self.kinds.get(field)
+        if kind is None:
+            raise KeyError(field)
+        self._columns[field][row] = self._encode(field, kind, value)
+
+    def column(self, field):
+        """The live array of codes/bounds/flags/rows for `field` (None if absent)"""
+        column = self._columns.get(field)
+        return None if column is None else column[:self._size]
+
+    def codes(self, field, key, keys):
+        """`field` per row as codes in `keys` after key() (e.g. normalize_day)"""
+        column = self.column(field)
+        if column is None:
+            return np.full(self._size, keys.code(key(None)), dtype=np.int32)
+        if keys is self.vocabularies[field]:
+            return column
+        return self.vocabularies[field].recode(key, keys)[column]
+
+    def bounds(self):
+        """(start, end) minute columns; NO_TIME where there is no interval"""
+        column = self.column("Interval")
+        if column is None:
+            column = self._empty(INTERVAL, self._size)
+        return column[:, 0], column[:, 1]
+
+    def category(self, field):
+        """(codes, values) of a CATEGORY field; codes are -1 where the table lacks it"""
+        column = self.column(field)
+        if column is None:
+            return np.full(self._size, -1, dtype=np.int32), []
+        return column, self.vocabularies[field].values
+
+    def referenced(self, reference, field):
+        """(codes, values) of `field` on the target row each `reference` points at (-1: none)"""
+        rows = self.column(reference)
+        codes, values = self.target.category(field)
+        if rows is None or not len(codes):
+            return np.full(self._size, -1, dtype=np.int32), values
+        return np.where(rows >= 0, codes[np.maximum(rows, 0)], -1).astype(np.int32), values
+
+
+class RosterStore:
+    """
+    Shifts and employees as columnar Tables. `shifts` and `employees` behave
+    like the lists of dicts generate_roster used to return. `unavailable`
+    maps a name to the normalized days that person can't work (WILDCARD: any
+    day); those pairs never match.
+    """
+
+    def __init__(self, shifts=(), employees=(), unavailable=None):
+        self.vocabularies = {}
+        self.employees = Table(EMPLOYEE_SCHEMA, self.vocabularies)
+        self.shifts = Table(SHIFT_SCHEMA, self.vocabularies, target=self.employees)
+        self.unavailable = unavailable or {}
+        self.employees.extend(employees)
+        self.shifts.extend(shifts)
+
+    def _flags(self):
+        flags = self.employees.column("Is_Assigned")
+        return np.zeros(len(self.employees), dtype=bool) if flags is None else flags
+
+    def available(self):
+        """Positions of employees not yet on a shift and not blocked()"""
+        return np.flatnonzero(~self._flags() & ~self.blocked())
+
+    def _day_blocks(self, days):
+        """(day code x name code) array: True where that person can't work that day"""
+        names = self.vocabularies.get("Name") or Vocabulary()
+        blocks = np.zeros((len(days), len(names)), dtype=bool)
+        for name, off in self.unavailable.items():
+            code = names.find(name)
+            if code is None: continue
+            if WILDCARD in off:
+                blocks[:, code] = True
+                continue
+            for day in off:
+                day_code = days.find(day)
+                if day_code is not None:
+                    blocks[day_code, code] = True
+        return blocks
+
+    def blocked(self):
+        """Employees whose own availability is ruled out by an unavailability"""
+        if not self.unavailable or self.employees.column("Name") is None:
+            return np.zeros(len(self.employees), dtype=bool)
+        days = Vocabulary()
+        e_day = self.employees.codes("Day", normalize_day, days)
+        return self._day_blocks(days)[e_day, self.employees.column("Name")]
+
+    def compatibility(self, general_fills_roles=True, undated_matches_all=True, match_times=False, role_cover=None):
+        """
+        Returns (candidates, profile, checked). Shifts with the same day, role
+        and time share a profile: candidates[p] holds the positions, ascending,
+        of the employees able to work a profile-p shift, profile[s] is shift
+        s's profile and checked counts the (profile, employee) pairs compared.
+
+        Available employees are bucketed by day and role code, and a profile
+        only compares the buckets that can serve it: a shift day takes that
+        day and undated staff; an undated shift takes anyone
+        (undated_matches_all) or undated staff only; a General shift takes any
+        role, a specific one that role, General staff (general_fills_roles)
+        and staff whose role covers it (role_cover). match_times then applies
+        app2's time rule: "Any" on either side fits, two intervals must nest
+        (looked up in each bucket's IntervalIndex), otherwise the time texts
+        must be equal. These are matching.compatible's rules.
+        """
+        shifts, employees = self.shifts, self.employees
+        if len(shifts) == 0:
+            return [], np.zeros(0, dtype=np.intp), 0
+
+        days, roles, times = Vocabulary(), Vocabulary(), self.vocabularies.setdefault("Time", Vocabulary())
+        any_day, any_role, any_time = days.code(WILDCARD), roles.code(WILDCARD), times.code("Any")
+        same = lambda value: value
+
+        shift_columns = np.column_stack([
+            shifts.codes("Day", normalize_day, days), shifts.codes("Role", normalize_role, roles),
+            shifts.codes("Time", same, times), *shifts.bounds(),
+        ])
+        unique, profile = np.unique(shift_columns, axis=0, return_inverse=True)
+
+        positions = self.available()
+        buckets = _buckets(
+            positions, employees.codes("Day", normalize_day, days)[positions],
+            employees.codes("Role", normalize_role, roles)[positions], len(roles),
+        )
+        fillers = {
+            roles.find(s_role): [code for code in map(roles.find, e_roles) if code is not None]
+            for s_role, e_roles in role_fillers(role_cover).items()
+        }
+        names = employees.column("Name")
+        # Nobody works a day they said they can't
+        blocks = self._day_blocks(days) if self.unavailable and names is not None else None
+        if match_times:
+            e_time = employees.codes("Time", same, times)
+            e_start, e_end = employees.bounds()
+
+        candidates, checked, indexes = [], 0, {}
+        for s_day, s_role, s_time, s_start, s_end in unique.tolist():
+            if s_day != any_day:
+                day_codes = [day for day in (s_day, any_day) if day in buckets]
+            elif undated_matches_all:
+                day_codes = list(buckets)
+            else:
+                day_codes = [any_day] if any_day in buckets else []
+            wanted = None if s_role == any_role else {s_role, *fillers.get(s_role, ())}
+            if wanted is not None and general_fills_roles:
+                wanted.add(any_role)
+            keys = [(day, role) for day in day_codes for role in buckets[day] if wanted is None or role in wanted]
+            checked += sum(len(buckets[day][role]) for day, role in keys)
+
+            if not match_times or s_time == any_time:
+                parts = [buckets[day][role] for day, role in keys]
+            elif s_start == NO_TIME:
+                parts = [buckets[day][role] for day, role in keys]
+                parts = [members[_time_fits(e_time[members], s_time, any_time)] for members in parts]
+            else:
+                # Timed availability comes from each bucket's interval index,
+                # only where it contains the shift; the rest compares time texts
+                parts = []
+                for day, role in keys:
+                    if (day, role) not in indexes:
+                        indexes[day, role] = _interval_index(buckets[day][role], e_start, e_end)
+                    untimed, timed = indexes[day, role]
+                    parts.append(untimed[_time_fits(e_time[untimed], s_time, any_time)])
+                    parts.append(np.array(timed.containing((s_start, s_end)), dtype=np.intp))
+            members = np.sort(np.concatenate(parts)) if parts else positions[:0]
+            if blocks is not None:
+                members = members[~blocks[s_day, names[members]]]
+            candidates.append(members)
+
+        return candidates, profile.reshape(-1), checked
+
+    def partition(self, candidates, profile):
+        """
+        Connected components of the compatibility graph: they share no
+        employees, so each can be solved on its own. Returns (shift rows,
+        employee positions) per component that has candidates, in order of
+        first shift. Shifts nobody can work belong to none.
+        """
+        from scipy.sparse import coo_matrix
+        from scipy.sparse.csgraph import connected_components
+
+        n_profiles, n_employees = len(candidates), len(self.employees)
+        p = np.repeat(np.arange(n_profiles), [len(members) for members in candidates])
+        e = np.concatenate(candidates) if candidates else np.zeros(0, dtype=np.intp)
+        size = n_profiles + n_employees
+        graph = coo_matrix((np.ones(len(p), dtype=np.int8), (p, n_profiles + e)), shape=(size, size))
+        _, labels = connected_components(graph, directed=False)
+
+        def groups(member_labels):
+            order = np.argsort(member_labels, kind="stable")
+            found, starts = np.unique(member_labels[order], return_index=True)
+            return dict(zip(found.tolist(), np.split(order, starts[1:])))
+
+        shift_groups, employee_groups = groups(labels[profile]), groups(labels[n_profiles:])
+        components = [
+            (rows, employee_groups[label]) for label, rows in shift_groups.items() if label in employee_groups
+        ]
+        components.sort(key=lambda component: component[0][0])
+        return components
+
+    def assign(self, solver="greedy", executor=None, **rules):
+        """
+        Matching phase on the columns: sets each shift's Assigned and its
+        employee's Is_Assigned. Greedy gives every shift, in order, its first
+        free candidate; the other solvers are matching.solve_assignment.
+        With an executor (a process pool) the graph is split by partition()
+        and the components are solved concurrently.
+        Returns counters: pairs checked, candidate pairs and shifts filled.
+        """
+        if solver not in SOLVERS:
+            raise ValueError(f"Unknown solver {solver!r}, expected one of {SOLVERS}")
+        if len(self.shifts) == 0:
+            return {"pairs_checked": 0, "candidate_pairs": 0, "shifts_filled": 0}
+        candidates, profile, checked = self.compatibility(**rules)
+        components = None if executor is None else self.partition(candidates, profile)
+
+        if components is not None and len(components) > 1:
+            match = self._solve_components(solver, candidates, profile, components, executor)
+        else:
+            lists = [members.tolist() for members in candidates]
+            match = solve_component(solver, lists, profile.tolist(), self.shifts, self.employees)
+
+        match = np.asarray(match, dtype=np.int32)
+        self.shifts.column("Assigned")[:] = match
+        filled = match[match >= 0]
+        if len(self.employees):
+            self.employees.column("Is_Assigned")[filled] = True
+        sizes = np.array([len(members) for members in candidates], dtype=np.int64)
+        stats = {
+            "pairs_checked": checked,
+            "candidate_pairs": int(sizes @ np.bincount(profile, minlength=len(candidates))),
+            "shifts_filled": len(filled),
+        }
+        if components is not None:
+            stats["components"] = len(components)
+        return stats
+
+    def _solve_components(self, solver, candidates, profile, components, executor):
+        # Results come back in submission order and are written to their own
+        # rows, so the roster does not depend on which worker finishes first
+        jobs = []
+        for rows, positions in components:
+            profiles, local_profile = np.unique(profile[rows], return_inverse=True)
+            # Component positions are ascending, so a search maps candidates to local indexes
+            local = [np.searchsorted(positions, candidates[p]).tolist() for p in profiles.tolist()]
+            jobs.append((
+                local, local_profile.reshape(-1).tolist(),
+                _records(self.shifts, rows, SOLVER_FIELDS[solver][0]),
+                _records(self.employees, positions, SOLVER_FIELDS[solver][1]),
+            ))
+        results = executor.map(
+            solve_component, repeat(solver), *zip(*jobs), chunksize=max(1, len(jobs) // COMPONENT_CHUNKS),
+        )
+
+        match = np.full(len(self.shifts), -1, dtype=np.int32)
+        for (rows, positions), local in zip(components, results):
+            local = np.asarray(local, dtype=np.intp)
+            match[rows] = np.where(local >= 0, positions[local], -1)
+        return match
+
+
+def _time_fits(times, s_time, any_time):
+    """Time texts (as codes) that fit a shift at `s_time` without comparing intervals"""
+    return (times == any_time) | (times == s_time)
+
+def _interval_index(members, starts, ends):
+    """(members without an interval, IntervalIndex of the others' intervals by position)"""
+    timed = starts[members] != NO_TIME
+    entries = zip(zip(starts[members[timed]].tolist(), ends[members[timed]].tolist()), members[timed].tolist())
+    return members[~timed], IntervalIndex(entries)
+
+def _buckets(positions, days, roles, n_roles):
+    """day code -> role code -> the positions with that day and role, ascending"""
+    keys = days.astype(np.int64) * n_roles + roles
+    order = np.argsort(keys, kind="stable")
+    found, starts = np.unique(keys[order], return_index=True)
+    buckets = {}
+    for key, members in zip(found.tolist(), np.split(positions[order], starts[1:])):
+        buckets.setdefault(key // n_roles, {})[key % n_roles] = members
+    return buckets
+
+
+# --- ARROW COLUMNS ---
+# Roster frames are built from the codes above without visiting a record:
+# each vocabulary is labelled once and every column is a pyarrow dictionary
+# array over the int32 codes (cheap to filter, render and write to Parquet).
+
+def dictionary_column(codes, values):
+    """pyarrow dictionary array of `values` (as str; None stays null) at `codes`; -1 is null"""
+    import pyarrow as pa
+
+    codes = np.asarray(codes, dtype=np.int32)
+    # Labels are deduplicated (pandas needs unique categories) and nulls go in
+    # the indices, since Parquet can't write a null inside the dictionary
+    labels = {}
+    remap = [labels.setdefault("" if value is None else str(value), len(labels)) for value in values]
+    indices = np.array(remap + [-1], dtype=np.int32)[codes]
+    missing = np.array([value is None for value in values] + [True])[codes]
+    return pa.DictionaryArray.from_arrays(pa.array(indices, mask=missing), pa.array(list(labels), pa.string()))
+
+def assignee_codes(shifts, unfilled="UNFILLED"):
+    """(codes, values) of the assigned employee's name per shift, `unfilled` where there is none"""
+    names, values = shifts.referenced("Assigned", "Name")
+    return np.where(names >= 0, names, len(values)), [*values, unfilled]
+
+
+# --- COMPONENT SOLVING ---
+# Module-level so process pool workers can run it on plain lists and dicts.
+# Workers only get the record fields their solver reads.
+SOLVER_FIELDS = {
+    "greedy": ((), ()),
+    "matching": ((), ()),
+    "preference": (("Day", "Role", "Time"), ("Preference",)),
+}
+COMPONENT_CHUNKS = 64  # Components are batched into about this many tasks
+
+def _records(table, rows, fields):
+    fields = [field for field in fields if field in table.kinds]
+    return [{field: table.get(row, field) for field in fields} for row in rows.tolist()]
+
+def solve_component(solver, candidates, profile, shifts, employees):
+    """
+    Assignment on one compatibility graph: candidates[p] lists the employee
+    positions able to work a profile-p shift and profile[s] is shift s's
+    profile. Returns the employee position (or -1) per shift.
+    """
+    if solver != "greedy":
+        adjacency = [candidates[p] for p in profile]
+        return solve_assignment(adjacency, shifts, employees, solver)
+
+    # Taken employees never come back, so each profile keeps a cursor
+    taken = [False] * len(employees)
+    cursor = [0] * len(candidates)
+    match = []
+    for p in profile:
+        found, k = candidates[p], cursor[p]
+        while k < len(found) and taken[found[k]]:
+            k += 1
+        if k < len(found):
+            match.append(found[k])
+            taken[found[k]] = True
+            k += 1
+        else:
+            match.append(-1)
+        cursor[p] = k
+    return match
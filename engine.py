@@ -0,0 +1,917 @@
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+from itertools import repeat
+
+from concurrent.futures.process import BrokenProcessPool
+
+from artifacts import (
+    ARTIFACT_DIR, artifact_lock, artifact_path, artifact_stamp, correct, load_or_train, load_spacy_model, read_artifact,
+    save_artifact,
+)
+from intervals import parse_time_range
+from matching import SOLVERS, normalize_day
+from metrics import PhaseMetrics
+from parse_cache import PARSE_CACHE, normalize_line
+from roles import load_taxonomy
+from templates import FastPath, parse_count
+
+# --- HEADLESS SCHEDULING ENGINE ---
+# Everything app.py and app2.py do between the text box and the table, with
+# no Streamlit dependency. spaCy and scikit-learn are imported the first time
+# an engine needs its models, so importing this module stays cheap.
+
+# Lines handed to nlp.pipe per batch
+PARSE_BATCH_SIZE = 256
+# Uncached batches at least this long are parsed in worker processes
+PARALLEL_MIN_LINES = int(os.environ.get("SCHEDULER_PARALLEL_MIN_LINES", "5000"))
+PARSE_PROCESSES = int(os.environ.get("SCHEDULER_PARSE_PROCESSES", "0")) or os.cpu_count() or 1
+# Rosters with at least this many shifts are solved per component in worker processes
+PARALLEL_MIN_SHIFTS = int(os.environ.get("SCHEDULER_PARALLEL_MIN_SHIFTS", "2000"))
+# How often (seconds) a loaded classifier checks for corrections saved by other processes
+MODEL_POLL_SECONDS = float(os.environ.get("SCHEDULER_MODEL_POLL_SECONDS", "2"))
+# Bumped when extraction rules change, so cached and stored parses are redone
+PARSER_VERSION = 2
+
+# --- 1. TRAINING DATA ---
+# app.py: Expanded Dataset (85 Sentences)
+APP_TRAINING_DATA = [
+    # AVAILABILITY (20 samples)
+    ("I can work Saturday", "AVAILABILITY"),
+    ("Bob is available Monday", "AVAILABILITY"),
+    ("I am free all day Tuesday", "AVAILABILITY"),
+    ("Put me down for the Wednesday shift", "AVAILABILITY"),
+    ("I can do the morning shift", "AVAILABILITY"),
+    ("Sign me up for Friday", "AVAILABILITY"),
+    ("I'm good to work this weekend", "AVAILABILITY"),
+    ("Available for the night shift", "AVAILABILITY"),
+    ("Ready to work on Thursday", "AVAILABILITY"),
+    ("I have open availability this week", "AVAILABILITY"),
+    ("I can take the cashier role", "AVAILABILITY"),
+    ("Sam is free to work", "AVAILABILITY"),
+    ("Schedule me for Monday", "AVAILABILITY"),
+    ("I'm around on Sunday", "AVAILABILITY"),
+    ("I can come in", "AVAILABILITY"),
+    ("Free to help out", "AVAILABILITY"),
+    ("I will be there", "AVAILABILITY"),
+    ("I can cover that shift", "AVAILABILITY"),
+    ("Alice is available", "AVAILABILITY"),
+    ("I have time on Friday", "AVAILABILITY"),
+
+    # UNAVAILABILITY (25 samples)
+    ("Sam cannot work", "UNAVAILABILITY"),
+    ("I am unable to work due to exam", "UNAVAILABILITY"),
+    ("I am sick", "UNAVAILABILITY"),
+    ("not available", "UNAVAILABILITY"),
+    ("I have a doctor appointment", "UNAVAILABILITY"),
+    ("Bob is out of town", "UNAVAILABILITY"),
+    ("I can't make it", "UNAVAILABILITY"),
+    ("Do not schedule me for Monday", "UNAVAILABILITY"),
+    ("I'm busy on Saturday", "UNAVAILABILITY"),
+    ("Taking a personal day", "UNAVAILABILITY"),
+    ("I have class so I can't work", "UNAVAILABILITY"),
+    ("My car broke down, cannot come", "UNAVAILABILITY"),
+    ("Sam is away", "UNAVAILABILITY"),
+    ("Please remove me from the schedule", "UNAVAILABILITY"),
+    ("I won't be able to work", "UNAVAILABILITY"),
+    ("Off duty today", "UNAVAILABILITY"),
+    ("Unavailable for the weekend", "UNAVAILABILITY"),
+    ("I have a family emergency", "UNAVAILABILITY"),
+    ("Taking the day off", "UNAVAILABILITY"),
+    ("Not free Tuesday", "UNAVAILABILITY"),
+    ("I have a dentist appointment", "UNAVAILABILITY"),
+    ("Going on vacation", "UNAVAILABILITY"),
+    ("Stuck in traffic, can't work", "UNAVAILABILITY"),
+    ("Feeling unwell", "UNAVAILABILITY"),
+    ("No availability", "UNAVAILABILITY"),
+
+    # SHIFT REQUEST (20 samples)
+    ("Need two cashiers", "SHIFT_REQUEST"),
+    ("Shift open for server", "SHIFT_REQUEST"),
+    ("We need stockers Friday", "SHIFT_REQUEST"),
+    ("Looking for a manager", "SHIFT_REQUEST"),
+    ("Who can work Monday?", "SHIFT_REQUEST"),
+    ("Need coverage for the morning", "SHIFT_REQUEST"),
+    ("One server needed", "SHIFT_REQUEST"),
+    ("Requires 3 people for inventory", "SHIFT_REQUEST"),
+    ("Opening available for 9-5", "SHIFT_REQUEST"),
+    ("We are short staffed on Saturday", "SHIFT_REQUEST"),
+    ("Need help on the floor", "SHIFT_REQUEST"),
+    ("Looking for someone to cover", "SHIFT_REQUEST"),
+    ("Vacant shift Tuesday", "SHIFT_REQUEST"),
+    ("Need a bartender", "SHIFT_REQUEST"),
+    ("Searching for staff", "SHIFT_REQUEST"),
+    ("Shift available 3-11", "SHIFT_REQUEST"),
+    ("We need more hands on deck", "SHIFT_REQUEST"),
+    ("Cashier role open", "SHIFT_REQUEST"),
+    ("Manager needed urgently", "SHIFT_REQUEST"),
+    ("Any takers for Friday?", "SHIFT_REQUEST"),
+
+    # PREFERENCE (20 samples)
+    ("Sam prefers mornings", "PREFERENCE"),
+    ("I prefer evening shifts", "PREFERENCE"),
+    ("Bob likes night shift", "PREFERENCE"),
+    ("I would rather work weekends", "PREFERENCE"),
+    ("Please give me the early shift", "PREFERENCE"),
+    ("I hate working Mondays", "PREFERENCE"),
+    ("I love the closing shift", "PREFERENCE"),
+    ("My preference is Tuesday", "PREFERENCE"),
+    ("Ideally I want 9-5", "PREFERENCE"),
+    ("I'd prefer not to close", "PREFERENCE"),
+    ("Sam likes to work alone", "PREFERENCE"),
+    ("Prefer the stock room", "PREFERENCE"),
+    ("I favor the afternoon slot", "PREFERENCE"),
+    ("Better if I work mornings", "PREFERENCE"),
+    ("I prefer to be a cashier", "PREFERENCE"),
+    ("Please assign me evenings", "PREFERENCE"),
+    ("I really like Sundays", "PREFERENCE"),
+    ("Preferred shift is 3-11", "PREFERENCE"),
+    ("I'd rather do restocking", "PREFERENCE"),
+    ("My choice is Friday", "PREFERENCE")
+]
+
+# app2.py: (Reduced list for brevity, but model logic works same as before)
+APP2_TRAINING_DATA = [
+    ("I can work Saturday", "AVAILABILITY"), ("Bob is available Monday", "AVAILABILITY"),
+    ("Sam cannot work", "UNAVAILABILITY"), ("I am sick", "UNAVAILABILITY"),
+    ("Need two cashiers", "SHIFT_REQUEST"), ("We need stockers", "SHIFT_REQUEST"),
+    ("Sam prefers mornings", "PREFERENCE"), ("I prefer evening shifts", "PREFERENCE")
+]
+
+# --- 2. LAZY MODEL LOADING ---
+Resources = namedtuple(
+    "Resources", ["nlp", "matcher", "role_matcher", "classifier", "fingerprint", "version", "corrections"],
+)
+
+_resources = {}
+_resources_lock = threading.Lock()
+_artifacts = {}  # Variant -> (Artifact in use, its file's stamp, monotonic time of the last check)
+
+def build_classifier():
+    """Text -> Vector -> Classifier. Hashed features keep the vocabulary open for partial_fit."""
+    from sklearn.feature_extraction.text import HashingVectorizer
+    from sklearn.pipeline import make_pipeline
+
+    from intent_model import SeenVocabularyNB
+
+    return make_pipeline(HashingVectorizer(n_features=2 ** 16, alternate_sign=False, norm=None), SeenVocabularyNB())
+
+def load_resources(engine_cls):
+    """
+    Loads (once per process and variant) the spaCy model, the Matcher, the
+    role PhraseMatcher and the classifier.
+    Every MODEL_POLL_SECONDS it swaps in a newer corrected classifier if any
+    process saved one.
+    """
+    with _resources_lock:
+        if engine_cls.name not in _resources:
+            from spacy.matcher import Matcher
+
+            nlp = load_spacy_model()
+            for pipe_name in engine_cls.unused_pipes:
+                if pipe_name in nlp.pipe_names:
+                    nlp.disable_pipe(pipe_name)
+
+            artifact = load_or_train(
+                engine_cls.name, engine_cls.training_data, engine_cls.matcher_patterns(), build_classifier,
+            )
+            matcher = Matcher(nlp.vocab)
+            for label, label_patterns in artifact.matcher_patterns.items():
+                matcher.add(label, label_patterns)
+            role_matcher = engine_cls.roles.phrase_matcher(nlp)
+            _resources[engine_cls.name] = Resources(nlp, matcher, role_matcher, None, None, None, None)
+            _use_artifact(engine_cls.name, artifact)
+        else:
+            _refresh_artifact(engine_cls.name)
+        return _resources[engine_cls.name]
+
+def _use_artifact(name, artifact):
+    """Serves `artifact`'s classifier (caller holds _resources_lock)"""
+    corrections = {normalize_line(c["text"]): c["intent"] for c in artifact.corrections}
+    _resources[name] = _resources[name]._replace(
+        classifier=artifact.model, fingerprint=artifact.fingerprint, version=artifact.version, corrections=corrections,
+    )
+    stamp = artifact_stamp(artifact_path(name, artifact.fingerprint, ARTIFACT_DIR))
+    _artifacts[name] = (artifact, stamp, time.monotonic())
+
+def _refresh_artifact(name, force=False):
+    """Picks up a newer version of the artifact in use (caller holds _resources_lock)"""
+    artifact, stamp, checked = _artifacts[name]
+    now = time.monotonic()
+    if not force and now - checked < MODEL_POLL_SECONDS: return
+    path = artifact_path(name, artifact.fingerprint, ARTIFACT_DIR)
+    current = artifact_stamp(path)
+    _artifacts[name] = (artifact, stamp, now)
+    if current == stamp: return
+    saved = read_artifact(path)
+    if saved is not None and saved.fingerprint == artifact.fingerprint and saved.version > artifact.version:
+        _use_artifact(name, saved)
+    else:
+        _artifacts[name] = (artifact, current, now)
+
+def apply_corrections(engine_cls, corrections):
+    """
+    Teaches engine_cls's classifier the right intent for misclassified lines
+    ((line, intent) pairs) with partial_fit, without retraining. The result is
+    saved as the next model version, which every process picks up; returns it.
+    """
+    resources = load_resources(engine_cls)
+    known = tuple(resources.classifier.classes_)
+    corrections = [(normalize_line(line), intent) for line, intent in corrections if line.strip()]
+    for _, intent in corrections:
+        if intent not in known:
+            raise ValueError(f"Unknown intent {intent!r}, expected one of {known}")
+    with _resources_lock:
+        current = _artifacts[engine_cls.name][0]
+        with artifact_lock(engine_cls.name, current.fingerprint):
+            # Build on whatever another process saved; none can save until we are done
+            saved = read_artifact(artifact_path(engine_cls.name, current.fingerprint, ARTIFACT_DIR))
+            if saved is not None and saved.fingerprint == current.fingerprint and saved.version > current.version:
+                _use_artifact(engine_cls.name, saved)
+                current = saved
+            if not corrections: return current.version
+            artifact = correct(current, corrections)
+            save_artifact(engine_cls.name, artifact)
+            _use_artifact(engine_cls.name, artifact)
+            return artifact.version
+
+
+# --- 3. ENGINES ---
+class RosterState:
+    """Supply, demand and conflicts folded from the lines seen so far"""
+
+    def __init__(self):
+        self.employees = []     # The Supply
+        self.shifts = []        # The Demand
+        self.conflicts = []     # The Log
+        self.last_person = None # Tracks context for "and Wednesday..." lines (app2)
+        self.by_name = {}       # Name -> that person's availability records
+        self.last_employee = None # Most recent availability record (app's nameless preferences)
+        self.unavailable = {}   # Name -> normalized days they can't work (WILDCARD: any day)
+
+    def add_employee(self, emp):
+        self.employees.append(emp)
+        self.last_employee = emp
+        if emp["Name"]:
+            self.by_name.setdefault(emp["Name"], []).append(emp)
+        return emp
+
+    def employees_named(self, name):
+        return self.by_name.get(name, ())
+
+    def prefer(self, name, line):
+        """Attaches a PREFERENCE line to `name`'s records (None: the latest record)"""
+        records = self.employees_named(name) if name else [self.last_employee] if self.last_employee else ()
+        for emp in records:
+            emp["Preference"] = line
+
+    def block(self, name, day):
+        """Records that `name` can't work `day` (None: at all); matching enforces it"""
+        self.unavailable.setdefault(name, set()).add(normalize_day(day))
+
+
+class RosterEngine:
+    """
+    app.py's pipeline: Naive Bayes intents, spaCy entities and role phrases,
+    then explicit requests first and inferred shifts for everyone left over.
+    """
+
+    name = "app"
+    training_data = APP_TRAINING_DATA
+    # extract_details only reads doc.ents (ner) and Matcher/PhraseMatcher spans
+    # (lexical attributes), so everything except ner is switched off.
+    unused_pipes = ["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer"]
+    # Canonical roles, their synonyms and hierarchy (roles.json)
+    roles = load_taxonomy(name)
+    # Regex fast path: times as the Matcher sees them (digits-punct-digits),
+    # roles as single-word synonyms in `roles`
+    fast_path = FastPath(time_pattern=r"(?<![\w:])\d{1,2}\s*-\s*\d{1,2}(?![\w:])", roles=roles)
+    # Compatibility rules for RosterStore.compatibility / matching.compatible
+    match_rules = {"role_cover": roles.covers}
+
+    def __init__(self, solver="greedy", batch_size=PARSE_BATCH_SIZE, parse_cache=PARSE_CACHE,
+                 processes=PARSE_PROCESSES, parallel_min_lines=PARALLEL_MIN_LINES, use_templates=True,
+                 parallel_min_shifts=PARALLEL_MIN_SHIFTS, history=None):
+        if solver not in SOLVERS:
+            raise ValueError(f"Unknown solver {solver!r}, expected one of {SOLVERS}")
+        self.solver = solver
+        self.batch_size = batch_size
+        self.processes = processes
+        self.parallel_min_lines = parallel_min_lines
+        self.parallel_min_shifts = parallel_min_shifts
+        self.parse_cache = parse_cache  # None parses every line every time
+        self.use_templates = use_templates
+        self.history = history  # RosterHistory: parses outlive the process, rosters are recorded
+        self.metrics = PhaseMetrics()  # Timers and counters of every call on this engine
+
+    @staticmethod
+    def matcher_patterns():
+        # Define Pattern for Time (e.g., 3-11, 9:00-5:00)
+        pattern_time = [{"IS_DIGIT": True, "OP": "+"}, {"IS_PUNCT": True, "OP": "+"}, {"IS_DIGIT": True}]
+        return {"TIME": [pattern_time]}
+
+    @property
+    def resources(self):
+        return load_resources(type(self))
+
+    @property
+    def model_id(self):
+        """Training fingerprint, correction version, role taxonomy and parser version: what parse caches and history are keyed by"""
+        resources = self.resources
+        return f"{resources.fingerprint}-v{resources.version}-r{self.roles.digest}-p{PARSER_VERSION}"
+
+    def correct_intents(self, corrections):
+        """apply_corrections for this variant: (line, intent) pairs in, new model version out"""
+        return apply_corrections(type(self), corrections)
+
+    # --- Parsing ---
+    def split_lines(self, lines):
+        """Drops blank lines; accepts a list of lines or the raw text"""
+        if isinstance(lines, str):
+            lines = lines.split('\n')
+        return [line for line in lines if line.strip()]
+
+    def classify_lines(self, lines):
+        """Predicts the intent and confidence of every line in one vectorized pass"""
+        if not lines:
+            return [], []
+        classifier = self.resources.classifier
+        probabilities = classifier.predict_proba(lines)
+        intents = classifier.classes_[probabilities.argmax(axis=1)].tolist()
+        confidences = probabilities.max(axis=1).tolist()
+        corrected = self.resources.corrections
+        if corrected:
+            for i, line in enumerate(lines):
+                intent = corrected.get(normalize_line(line))
+                if intent is not None:
+                    intents[i], confidences[i] = intent, 1.0
+        return intents, confidences
+
+    def extract_details(self, text, intent, last_person=None):
+        details = self.details_from_doc(self.resources.nlp(text), intent)
+        return self.resolve_context([details], [intent], last_person)[0]
+
+    def parse_lines(self, lines, intents, last_person=None):
+        """Runs all lines through nlp.pipe and returns their details in input order"""
+        return self.resolve_context(self.parse_docs(lines, intents), intents, last_person)
+
+    def parse_docs(self, lines, intents):
+        """Context-free details per line, as stored in the parse cache"""
+        if self.processes > 1 and len(lines) >= self.parallel_min_lines:
+            return self.parse_parallel(lines, intents)
+        docs = self.resources.nlp.pipe(lines, batch_size=self.batch_size)
+        return [self.details_from_doc(doc, intent) for doc, intent in zip(docs, intents)]
+
+    def parse_parallel(self, lines, intents):
+        """
+        parse_docs spread over worker processes that load the models once each.
+        Lines go out in contiguous chunks and come back in input order; context
+        is resolved afterwards, in this process.
+        """
+        size = -(-len(lines) // (self.processes * 4))
+        starts = range(0, len(lines), size)
+        try:
+            results = parse_pool(self.name, self.processes).map(
+                _parse_chunk, repeat(self.name), repeat(self.batch_size),
+                [lines[i:i + size] for i in starts], [intents[i:i + size] for i in starts],
+            )
+            return [details for chunk in results for details in chunk]
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory): retire the pool and parse here
+            discard_pool(self.name, self.processes)
+            docs = self.resources.nlp.pipe(lines, batch_size=self.batch_size)
+            return [self.details_from_doc(doc, intent) for doc, intent in zip(docs, intents)]
+
+    def resolve_context(self, parsed, intents, last_person=None):
+        """Fills in details that depend on earlier lines (app.py has none)"""
+        return parsed
+
+    def analyze_lines(self, lines, last_person=None):
+        """
+        Returns (intents, confidences, parsed) for `lines`. Lines found in the
+        parse cache cost nothing, templated lines take the regex fast path,
+        and only the rest are classified and parsed, in one batch.
+        """
+        metrics = self.metrics
+        texts, entries, pending = self.lookup_lines(lines)
+        missing = [text for text in pending if entries[text] is None]
+        if missing:
+            with metrics.phase("classify"):
+                intents, confidences = self.classify_lines(missing)
+            with metrics.phase("extract"):
+                parsed = self.parse_docs(missing, intents)
+            for text, intent, confidence, details in zip(missing, intents, confidences, parsed):
+                entries[text] = (intent, confidence, details)
+        return self.finish_lines(texts, entries, pending, last_person)
+
+    def lookup_lines(self, lines):
+        """
+        First half of analyze_lines: (texts, entries, pending). entries maps
+        each normalized text to its cached or templated (intent, confidence,
+        details), or None where the models are needed; pending lists the
+        texts found neither in the cache nor in the history store.
+        """
+        metrics = self.metrics
+        cache = self.parse_cache
+        namespace = (self.name, self.model_id)
+        texts = [normalize_line(line) for line in lines]
+        entries = {}
+        for text in texts:
+            if text not in entries:
+                entries[text] = cache.get((namespace, text)) if cache is not None else None
+
+        pending = [text for text, entry in entries.items() if entry is None]
+        cache_hits = len(texts) - len(pending)
+        if self.history is not None and pending:
+            with metrics.phase("history"):
+                stored = self.history.load_parses(self.name, self.model_id, pending)
+            for text, entry in stored.items():
+                entries[text] = entry
+                if cache is not None:
+                    cache.put((namespace, text), entry)
+            metrics.count("history_hits", len(stored))
+            pending = [text for text in pending if entries[text] is None]
+        templated = 0
+        with metrics.phase("templates"):
+            for text in pending:
+                entries[text] = self.match_template(text)
+                templated += entries[text] is not None
+        if cache is not None:
+            metrics.count("cache_hits", cache_hits)
+        metrics.count("lines", len(texts))
+        metrics.count("lines_templated", templated)
+        metrics.count("lines_parsed", len(pending) - templated)
+        return texts, entries, pending
+
+    def finish_lines(self, texts, entries, pending, last_person=None):
+        """Second half of analyze_lines, once every entry is filled in: caches and stores the new ones"""
+        if self.parse_cache is not None:
+            namespace = (self.name, self.model_id)
+            for text in pending:
+                self.parse_cache.put((namespace, text), entries[text])
+        if self.history is not None and pending:
+            with self.metrics.phase("history"):
+                self.history.save_parses(self.name, self.model_id, ((text, entries[text]) for text in pending))
+        intents = [entries[text][0] for text in texts]
+        confidences = [entries[text][1] for text in texts]
+        # Copies, so context and scheduling never write into cached entries
+        parsed = [dict(entries[text][2]) for text in texts]
+        return intents, confidences, self.resolve_context(parsed, intents, last_person)
+
+    def match_template(self, text):
+        """(intent, confidence, details) from the regex fast path, or None to use the models"""
+        if not self.use_templates: return None
+        found = self.fast_path.match(text)
+        if found is None: return None
+        intent, name, day, time, role = found
+        intent = self.resources.corrections.get(text, intent)  # A manager's correction beats the template
+        return intent, 1.0, self.template_details(name, day, time, role, text)
+
+    def template_details(self, name, day, time, role, text):
+        return {"Name": name, "Day": day, "Time": time, "Role": role, "Count": parse_count(text, self.roles)}
+
+    @property
+    def template_hit_rate(self):
+        """Share of the lines that needed work which the fast path handled"""
+        templated = self.metrics.counters.get("lines_templated", 0)
+        handled = templated + self.metrics.counters.get("lines_parsed", 0)
+        return templated / handled if handled else 0.0
+
+    def details_from_doc(self, doc, intent):
+        data = {"Name": None, "Day": None, "Time": None, "Role": None, "Count": parse_count(doc.text, self.roles)}
+
+        # Extract Name (Person)
+        for ent in doc.ents:
+            if ent.label_ == "PERSON":
+                data["Name"] = ent.text
+            if ent.label_ == "DATE":
+                data["Day"] = ent.text
+
+        # Extract Time (Regex Matcher)
+        for match_id, start, end in self.resources.matcher(doc):
+            data["Time"] = doc[start:end].text
+
+        # Extract Role (one PhraseMatcher pass over the role synonyms)
+        data["Role"] = self.roles.pick(self.roles.in_doc(doc, self.resources.role_matcher))
+
+        return data
+
+    # --- Scheduling ---
+    def sort_lines(self, lines, intents, parsed, state=None):
+        """Sorts parsed lines into employees (supply), shifts (demand) and conflicts"""
+        state = state or RosterState()
+        shifts, conflicts = state.shifts, state.conflicts
+
+        for line, intent, details in zip(lines, intents, parsed):
+            if intent == "UNAVAILABILITY":
+                name = details['Name'] or "Unknown Employee"
+                conflicts.append(f"❌ **{name}** is unavailable ({line})")
+                if details["Name"]:
+                    state.block(details["Name"], details["Day"])
+
+            elif intent == "AVAILABILITY":
+                state.add_employee({
+                    "Name": details["Name"],
+                    "Day": details["Day"],
+                    "Time": details["Time"] or "Any",
+                    "Role": details["Role"] or "General",
+                    "Preference": None,
+                    "Is_Assigned": False
+                })
+
+            elif intent == "PREFERENCE":
+                state.prefer(details["Name"], line)
+
+            elif intent == "SHIFT_REQUEST":
+                for _ in range(details["Count"]):
+                    shifts.append({
+                        "Day": details["Day"],
+                        "Time": details["Time"] or "9-5",
+                        "Role": details["Role"] or "General",
+                        "Assigned": None,
+                        "Source": "Explicit Request"
+                    })
+
+        return state
+
+    def match(self, store):
+        # Candidates are matched by day/role; unknown days and General roles match anything
+        return self.assign(store, **self.match_rules)
+
+    def assign(self, store, **rules):
+        """store.assign with this engine's solver, split over worker processes for large rosters"""
+        if self.processes <= 1 or len(store.shifts) < self.parallel_min_shifts:
+            return store.assign(self.solver, **rules)
+        try:
+            return store.assign(self.solver, executor=solve_pool(self.processes), **rules)
+        except BrokenProcessPool:
+            # A worker died; nothing was written yet, so solve in-process
+            discard_pool("solve", self.processes)
+            return store.assign(self.solver, **rules)
+
+    def inferred_shift(self, emp):
+        return {
+            "Day": emp["Day"] or "TBD",
+            "Time": emp["Time"],
+            "Role": emp["Role"],
+            "Assigned": emp,
+            "Source": "Inferred from Availability"
+        }
+
+    def generate_roster(self, lines):
+        """
+        Returns (shifts, conflicts, employees, intent_log); intent_log holds a
+        (line, intent, confidence) tuple per processed line.
+        """
+        metrics = self.metrics
+        with metrics.phase("load_resources"):
+            self.resources
+
+        # 1. Parse Phase (one classifier pass, one nlp.pipe pass, for uncached lines only)
+        with metrics.phase("parse"):
+            lines = self.split_lines(lines)
+            intents, confidences, parsed = self.analyze_lines(lines)
+        intent_log = list(zip(lines, intents, confidences))
+        with metrics.phase("sort"):
+            state = self.sort_lines(lines, intents, parsed)
+        store = self.schedule(state.shifts, state.employees, state.unavailable)
+        return store.shifts, state.conflicts, store.employees, intent_log
+
+    def schedule(self, shifts, employees, unavailable=None):
+        """
+        Matching and inference phases on a columnar copy of the records.
+        `unavailable` (name -> normalized days) keeps people off the days they
+        can't work. Returns the RosterStore; its shifts and employees read like dicts.
+        """
+        from columnar import RosterStore
+
+        with self.metrics.phase("store"):
+            store = RosterStore(shifts, employees, unavailable)
+        return self.schedule_store(store)
+
+    def schedule_store(self, store):
+        """schedule() on a RosterStore that is already filled (streaming folds into one); returns it"""
+        metrics = self.metrics
+        metrics.count("shifts_requested", len(store.shifts))
+        metrics.count("employees", len(store.employees))
+        metrics.count("employees_blocked", int(store.blocked().sum()))
+
+        # 2. Matching Phase (Explicit Requests First)
+        with metrics.phase("matching"):
+            stats = self.match(store)
+        for name, value in (stats or {}).items():
+            metrics.count(name, value)
+
+        # 3. Inference Phase (Supply-Driven)
+        with metrics.phase("inference"):
+            inferred = self.infer(store)
+        metrics.count("shifts_inferred", inferred)
+
+        if self.history is not None:
+            with metrics.phase("history"):
+                self.history.save_run(self.name, self.solver, store.shifts)
+        return store
+
+    def infer(self, store):
+        """Adds a shift for every available employee the matching phase left without one; returns how many"""
+        leftover = store.available()
+        store.shifts.extend(self.inferred_shift(store.employees[position]) for position in leftover)
+        if len(leftover):
+            store.employees.column("Is_Assigned")[leftover] = True
+        return len(leftover)
+
+    def roster_rows(self, shifts):
+        """The Final Roster table, one dict per shift"""
+        return [self.roster_row(s) for s in shifts]
+
+    def roster_row(self, s):
+        assignee = s['Assigned']['Name'] if s['Assigned'] else "UNFILLED"
+        # Determine note: If preference exists, show it. Else show source.
+        if s['Assigned'] and s['Assigned']['Preference']:
+            note = f"✅ MATCHED PREF: {s['Assigned']['Preference']}"
+        else:
+            note = s['Source']
+
+        return {
+            "Day": s['Day'],
+            "Shift Time": s['Time'],
+            "Role": s['Role'],
+            "Employee": assignee,
+            "Status": note
+        }
+
+    def roster_table(self, shifts):
+        """
+        roster_rows as a pyarrow Table, built column by column from a columnar
+        shift table (RosterStore.shifts) without materializing a row dict
+        """
+        import numpy as np
+        import pyarrow as pa
+        from columnar import assignee_codes, dictionary_column
+
+        prefs, pref_values = shifts.referenced("Assigned", "Preference")
+        sources, source_values = shifts.category("Source")
+        # Note: the preference when the assignee has one, the source otherwise
+        matched = np.array([bool(value) for value in pref_values] + [False])[prefs]
+        notes = np.where(matched, prefs, np.where(sources >= 0, len(pref_values) + sources, -1))
+        note_values = [f"✅ MATCHED PREF: {value}" for value in pref_values] + list(source_values)
+        return pa.table({
+            "Day": dictionary_column(*shifts.category("Day")),
+            "Shift Time": dictionary_column(*shifts.category("Time")),
+            "Role": dictionary_column(*shifts.category("Role")),
+            "Employee": dictionary_column(*assignee_codes(shifts)),
+            "Status": dictionary_column(notes, note_values),
+        })
+
+
+class ContextRosterEngine(RosterEngine):
+    """
+    app2.py's pipeline: compound lines are split, names carry over to the next
+    clause, roles come from the role taxonomy and times are matched as intervals.
+    """
+
+    name = "app2"
+    training_data = APP2_TRAINING_DATA
+    # Names and dates come from ner, times and roles from the Matcher and
+    # PhraseMatcher (lexical attributes only), so everything except ner is
+    # switched off.
+    unused_pipes = ["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer"]
+
+    # Stock, Cashier, Supervisor (covers Cashier) and General, the default
+    roles = load_taxonomy(name)
+    # Regex fast path: times as the TIME patterns below see them, roles as
+    # single-word synonyms in `roles`
+    fast_path = FastPath(
+        time_pattern=(
+            r"(?<![\w:])\d{1,2}(?::\d{2})?\s*(?:[ap]\.?m\b\.?)?\s*"
+            r"(?:-|to|until|till)\s*\d{1,2}(?::\d{2})?(?:\s*[ap]\.?m\b\.?)?(?![\w:])"
+        ),
+        roles=roles,
+    )
+    match_rules = {
+        "general_fills_roles": False, "undated_matches_all": False, "match_times": True, "role_cover": roles.covers,
+    }
+
+    @staticmethod
+    def matcher_patterns():
+        # IMPROVED TIME PATTERN
+        # Captures "9-5", "9:00-5:00", "12 to 8", "9 am - 5 pm", "9am-5pm"
+        clock = {"TEXT": {"REGEX": r"^\d{1,2}(:\d{2})?$"}}
+        meridiem = {"LOWER": {"IN": ["am", "pm", "a.m.", "p.m."]}, "OP": "?"}
+        pattern_time = [
+            [clock, meridiem, {"IS_PUNCT": True}, clock, meridiem],
+            [clock, meridiem, {"LOWER": {"IN": ["to", "until", "till"]}}, clock, meridiem],
+            [{"LOWER": {"REGEX": r"^\d{1,2}(:\d{2})?(am|pm)?-\d{1,2}(:\d{2})?(am|pm)?$"}}]
+        ]
+        return {"TIME": pattern_time}
+
+    # --- Parsing ---
+    def split_lines(self, lines):
+        """
+        Splits compound sentences like 'Alice works Monday and Wednesday'
+        into two separate processing lines.
+        """
+        if not isinstance(lines, str):
+            lines = '\n'.join(lines)
+        processed_lines = []
+
+        # Split by newlines first
+        for line in lines.split('\n'):
+            if not line.strip(): continue
+
+            # Split on " and " / "; " (careful: names like "Bob and Sam" split too)
+            for part in re.split(r' and |; ', line):
+                if part.strip():
+                    processed_lines.append(part.strip())
+
+        return processed_lines
+
+    def template_details(self, name, day, time, role, text):
+        # Free-text templates leave the role to us: any mention in the line counts
+        return {
+            "Name": name, "Day": day, "Time": time or "Any", "Role": self.roles.pick(self.roles.mentions(text)),
+            "Count": parse_count(text, self.roles), "Interval": parse_time_range(time) if time else None,
+        }
+
+    def resolve_context(self, parsed, intents, last_person=None):
+        """
+        The name context is carried across lines after the batch is parsed,
+        starting from `last_person` when continuing an earlier batch.
+        """
+        for details, intent in zip(parsed, intents):
+            # CONTEXT MEMORY: If no name found, assume it's the person from the previous clause
+            # Example: "Alice works Monday... and [Alice] works Wednesday..."
+            if details["Name"] is None and last_person and intent == "AVAILABILITY":
+                details["Name"] = last_person
+            if details["Name"]:
+                last_person = details["Name"]
+        return parsed
+
+    def details_from_doc(self, doc, intent):
+        from spacy.util import filter_spans
+
+        data = {"Name": None, "Day": None, "Time": "Any", "Role": "General", "Count": parse_count(doc.text, self.roles)}
+
+        # 1. Extract Name (Person)
+        for ent in doc.ents:
+            if ent.label_ == "PERSON":
+                data["Name"] = ent.text
+
+        # 2. Extract Date
+        for ent in doc.ents:
+            if ent.label_ == "DATE":
+                data["Day"] = ent.text
+
+        # 3. Extract Time (Regex Matcher), parsed into a minute interval
+        for span in filter_spans(self.resources.matcher(doc, as_spans=True)):
+            data["Time"] = span.text
+        data["Interval"] = parse_time_range(data["Time"]) if data["Time"] != "Any" else None
+
+        # 4. Extract Role (one PhraseMatcher pass over the role synonyms)
+        # Catches "floor", "register" and "supervisor" as well as the role names
+        data["Role"] = self.roles.pick(self.roles.in_doc(doc, self.resources.role_matcher))
+
+        return data
+
+    # --- Scheduling ---
+    def sort_lines(self, lines, intents, parsed, state=None):
+        state = state or RosterState()
+        shifts, conflicts = state.shifts, state.conflicts
+
+        for line, intent, details in zip(lines, intents, parsed):
+            # Update context
+            if details["Name"]:
+                state.last_person = details["Name"]
+
+            if intent == "UNAVAILABILITY":
+                name = details['Name'] or "Unknown"
+                conflicts.append(f"❌ **{name}** is unavailable ({line})")
+                if details["Name"]:
+                    state.block(details["Name"], details["Day"])
+
+            elif intent == "AVAILABILITY":
+                state.add_employee({
+                    "Name": details["Name"],
+                    "Day": details["Day"],
+                    "Time": details["Time"],
+                    "Interval": details["Interval"],
+                    "Role": details["Role"],
+                    "Preference": None,
+                    "Is_Assigned": False
+                })
+
+            elif intent == "PREFERENCE":
+                # Attach preference to relevant employee
+                target_name = details["Name"] or state.last_person
+                if target_name:
+                    state.prefer(target_name, line)
+
+            elif intent == "SHIFT_REQUEST":
+                for _ in range(details["Count"]):
+                    shifts.append({
+                        "Day": details["Day"],
+                        "Time": details["Time"],
+                        "Interval": details["Interval"],
+                        "Role": details["Role"],
+                        "Assigned": None,
+                        "Source": "Explicit Request"
+                    })
+
+        return state
+
+    def match(self, store):
+        # 1. Day Check: days are normalized to weekdays ('on Sunday' -> sunday);
+        #    employees without a day fit any shift.
+        # 2. Role Check (Hierarchy: Specific > General): a General request takes
+        #    anyone, a specific one needs that role. For now, strict: General
+        #    staff can't be Supervisor.
+        # 3. Time Check: Handle "Any" vs Specific: "Available all day" matches
+        #    any shift, otherwise the availability has to cover the whole shift
+        #    (9-5 covers 9-1).
+        return self.assign(store, **self.match_rules)
+
+    def inferred_shift(self, emp):
+        shift = super().inferred_shift(emp)
+        shift["Interval"] = emp["Interval"]
+        return shift
+
+    def roster_row(self, s):
+        assignee = s['Assigned']['Name'] if s['Assigned'] else "UNFILLED"
+        pref = s['Assigned'].get('Preference', '') if s['Assigned'] else ''
+
+        # Highlight Matches
+        status = "✅ Scheduled" if s['Assigned'] else "❌ Unfilled"
+        if "Inferred" in s['Source']: status = "ℹ️ Added (Availability)"
+
+        return {
+            "Day": s['Day'],
+            "Time": s['Time'],
+            "Role": s['Role'],
+            "Employee": assignee,
+            "Preference Note": pref,
+            "Status": status
+        }
+
+    def roster_table(self, shifts):
+        import numpy as np
+        import pyarrow as pa
+        from columnar import assignee_codes, dictionary_column
+
+        assigned = shifts.column("Assigned")
+        if assigned is None:
+            assigned = np.full(len(shifts), -1)
+        prefs, pref_values = shifts.referenced("Assigned", "Preference")
+        sources, source_values = shifts.category("Source")
+        inferred = np.array(["Inferred" in str(value) for value in source_values] + [False])[sources]
+        status = np.where(inferred, 2, np.where(assigned >= 0, 0, 1))
+        return pa.table({
+            "Day": dictionary_column(*shifts.category("Day")),
+            "Time": dictionary_column(*shifts.category("Time")),
+            "Role": dictionary_column(*shifts.category("Role")),
+            "Employee": dictionary_column(*assignee_codes(shifts)),
+            "Preference Note": dictionary_column(np.where(prefs >= 0, prefs, len(pref_values)), [*pref_values, ""]),
+            "Status": dictionary_column(status, ["✅ Scheduled", "❌ Unfilled", "ℹ️ Added (Availability)"]),
+        })
+
+
+ENGINES = {engine.name: engine for engine in (RosterEngine, ContextRosterEngine)}
+
+
+# --- 4. PARALLEL PARSING AND SOLVING ---
+# One pool per (variant, size), created on first use and reused, plus one
+# model-free "solve" pool per size for partitioned matching. "spawn" keeps
+# workers clear of locks held by the threads of a Streamlit server.
+_pools = {}
+_pools_lock = threading.Lock()
+
+def _pool(name, processes, initializer=None, initargs=()):
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import get_context
+
+    with _pools_lock:
+        if (name, processes) not in _pools:
+            _pools[name, processes] = ProcessPoolExecutor(
+                processes, mp_context=get_context("spawn"), initializer=initializer, initargs=initargs,
+            )
+        return _pools[name, processes]
+
+def parse_pool(name, processes):
+    return _pool(name, processes, _warm_worker, (name,))
+
+def solve_pool(processes):
+    return _pool("solve", processes)
+
+def discard_pool(name, processes):
+    with _pools_lock:
+        pool = _pools.pop((name, processes), None)
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def _warm_worker(name):
+    load_resources(ENGINES[name])
+
+def _parse_chunk(name, batch_size, lines, intents):
+    engine = ENGINES[name](batch_size=batch_size, parse_cache=None, processes=1)
+    return engine.parse_docs(lines, intents)
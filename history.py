@@ -0,0 +1,289 @@
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import date, datetime
+
+from matching import normalize_day, normalize_role
+
+# --- PERSISTENT MESSAGE AND ROSTER HISTORY ---
+# One SQLite file keeps every parsed line (intent, extracted fields, model
+# fingerprint) and every generated roster. Engines given a RosterHistory
+# load earlier parses from it instead of running the models again, and
+# record each roster they schedule, so questions like "who worked Fridays
+# last month" are a query, not a rerun:
+#     python history.py --day friday --since 2026-09-01 --until 2026-10-01 --workload
+
+HISTORY_DB = os.environ.get(
+    "SCHEDULER_HISTORY_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".history", "roster_history.sqlite3")
+)
+QUERY_CHUNK = 500  # texts per IN (...) lookup, below SQLite's variable limit
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    variant TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    text TEXT NOT NULL,
+    intent TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    name TEXT,
+    day TEXT NOT NULL,
+    role TEXT NOT NULL,
+    time TEXT,
+    details TEXT NOT NULL,
+    parsed_at REAL NOT NULL,
+    UNIQUE (variant, fingerprint, text)
+);
+CREATE INDEX IF NOT EXISTS messages_name ON messages (name);
+CREATE INDEX IF NOT EXISTS messages_day ON messages (day);
+CREATE INDEX IF NOT EXISTS messages_role ON messages (role);
+
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    variant TEXT NOT NULL,
+    solver TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    shifts INTEGER NOT NULL,
+    filled INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_created ON runs (created_at);
+
+CREATE TABLE IF NOT EXISTS shifts (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    day TEXT,
+    weekday TEXT NOT NULL,
+    time TEXT,
+    role TEXT,
+    role_key TEXT NOT NULL,
+    employee TEXT,
+    source TEXT
+);
+CREATE INDEX IF NOT EXISTS shifts_employee ON shifts (employee);
+CREATE INDEX IF NOT EXISTS shifts_weekday ON shifts (weekday);
+CREATE INDEX IF NOT EXISTS shifts_role ON shifts (role_key);
+CREATE INDEX IF NOT EXISTS shifts_run ON shifts (run_id);
+"""
+
+def _epoch(value):
+    """Seconds since the epoch from a datetime, a date (midnight, local) or a number"""
+    if value is None or isinstance(value, (int, float)): return value
+    if isinstance(value, datetime): return value.timestamp()
+    if isinstance(value, date): return datetime(value.year, value.month, value.day).timestamp()
+    raise TypeError(f"Expected a date, datetime or epoch seconds, got {type(value).__name__}")
+
+def _text(value):
+    return None if value is None else str(value)
+
+
+class RosterHistory:
+    """Parsed messages and generated rosters in SQLite; one instance can be shared across threads"""
+
+    def __init__(self, path=HISTORY_DB):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self.connection:
+            if path != ":memory:":
+                self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA foreign_keys=ON")
+            self.connection.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self.connection.close()
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return [dict(row) for row in self.connection.execute(sql, params)]
+
+    # --- PARSES ---
+    def load_parses(self, variant, fingerprint, texts):
+        """{text: (intent, confidence, details)} for the texts parsed before with this model"""
+        found = {}
+        texts = list(texts)
+        for start in range(0, len(texts), QUERY_CHUNK):
+            chunk = texts[start:start + QUERY_CHUNK]
+            rows = self._query(
+                f"SELECT text, intent, confidence, details FROM messages "
+                f"WHERE variant = ? AND fingerprint = ? AND text IN ({', '.join('?' * len(chunk))})",
+                [variant, fingerprint, *chunk],
+            )
+            for row in rows:
+                details = json.loads(row["details"])
+                if details.get("Interval") is not None:
+                    details["Interval"] = tuple(details["Interval"])
+                found[row["text"]] = (row["intent"], row["confidence"], details)
+        return found
+
+    def save_parses(self, variant, fingerprint, entries):
+        """Bulk-stores (text, (intent, confidence, details)) pairs; texts already stored are kept"""
+        now = time.time()
+        rows = [
+            (
+                variant, fingerprint, text, intent, confidence, details.get("Name"),
+                normalize_day(details.get("Day")), normalize_role(details.get("Role")), _text(details.get("Time")),
+                json.dumps(details), now,
+            )
+            for text, (intent, confidence, details) in entries
+        ]
+        if not rows: return
+        with self._lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO messages (variant, fingerprint, text, intent, confidence, name, day, role, time, details, parsed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    # --- ROSTERS ---
+    def save_run(self, variant, solver, shifts):
+        """Stores a generated roster (shift records with Assigned) in one transaction; returns its run id"""
+        rows = [
+            (
+                position, _text(shift["Day"]), normalize_day(shift["Day"]), _text(shift["Time"]),
+                _text(shift["Role"]), normalize_role(shift["Role"]),
+                shift["Assigned"]["Name"] if shift["Assigned"] else None, shift["Source"],
+            )
+            for position, shift in enumerate(shifts)
+        ]
+        filled = sum(row[6] is not None for row in rows)
+        with self._lock, self.connection:
+            run_id = self.connection.execute(
+                "INSERT INTO runs (variant, solver, created_at, shifts, filled) VALUES (?, ?, ?, ?, ?)",
+                (variant, solver, time.time(), len(rows), filled),
+            ).lastrowid
+            self.connection.executemany(
+                "INSERT INTO shifts (run_id, position, day, weekday, time, role, role_key, employee, source) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(run_id, *row) for row in rows],
+            )
+        return run_id
+
+    # --- QUERIES ---
+    def _shift_filters(self, employee, day, role, since, until, variant):
+        clauses, params = [], []
+        for column, value in (("shifts.employee", employee), ("shifts.weekday", day and normalize_day(day)),
+                              ("shifts.role_key", role and normalize_role(role)), ("runs.variant", variant)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("runs.created_at >= ?")
+            params.append(_epoch(since))
+        if until is not None:
+            clauses.append("runs.created_at < ?")
+            params.append(_epoch(until))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def shifts(self, employee=None, day=None, role=None, since=None, until=None, variant=None, limit=1000):
+        """
+        Stored shifts, newest roster first. day and role match the way the
+        scheduler compares them ('on Friday' finds 'Friday'); since/until
+        bound the time the roster was generated.
+        """
+        where, params = self._shift_filters(employee, day, role, since, until, variant)
+        rows = self._query(
+            "SELECT runs.id AS run, runs.created_at, runs.variant, runs.solver, shifts.day, shifts.time, "
+            "shifts.role, shifts.employee, shifts.source FROM shifts JOIN runs ON runs.id = shifts.run_id"
+            f"{where} ORDER BY runs.created_at DESC, shifts.position LIMIT ?",
+            [*params, limit],
+        )
+        return [
+            {
+                "Run": row["run"], "Generated": datetime.fromtimestamp(row["created_at"]).isoformat(timespec="seconds"),
+                "Variant": row["variant"], "Solver": row["solver"], "Day": row["day"], "Time": row["time"],
+                "Role": row["role"], "Employee": row["employee"] or "UNFILLED", "Source": row["source"],
+            }
+            for row in rows
+        ]
+
+    def workload(self, day=None, role=None, since=None, until=None, variant=None):
+        """Shifts worked per employee (most first) over the matching stored rosters"""
+        where, params = self._shift_filters(None, day, role, since, until, variant)
+        where += (" AND " if where else " WHERE ") + "shifts.employee IS NOT NULL"
+        rows = self._query(
+            "SELECT shifts.employee, COUNT(*) AS shifts, COUNT(DISTINCT runs.id) AS runs "
+            f"FROM shifts JOIN runs ON runs.id = shifts.run_id{where} "
+            "GROUP BY shifts.employee ORDER BY shifts DESC, shifts.employee",
+            params,
+        )
+        return [{"Employee": row["employee"], "Shifts": row["shifts"], "Rosters": row["runs"]} for row in rows]
+
+    def messages(self, name=None, day=None, role=None, intent=None, limit=1000):
+        """
+        Stored parses, newest first, filtered by extracted name, day, role or
+        intent. Day and Role are shown as extracted (no role: General), not
+        as the normalized keys the filters compare.
+        """
+        clauses, params = [], []
+        for column, value in (("name", name), ("day", day and normalize_day(day)),
+                              ("role", role and normalize_role(role)), ("intent", intent)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        rows = self._query(
+            f"SELECT text, intent, confidence, name, details, time, variant, parsed_at FROM messages{where} "
+            "ORDER BY parsed_at DESC, id DESC LIMIT ?",
+            [*params, limit],
+        )
+        details = [json.loads(row["details"]) for row in rows]
+        return [
+            {
+                "Message": row["text"], "Intent": row["intent"], "Confidence": round(row["confidence"], 3),
+                "Name": row["name"], "Day": found.get("Day"), "Role": found.get("Role") or "General", "Time": row["time"],
+                "Variant": row["variant"], "Parsed": datetime.fromtimestamp(row["parsed_at"]).isoformat(timespec="seconds"),
+            }
+            for row, found in zip(rows, details)
+        ]
+
+    def runs(self, limit=50, variant=None):
+        """Stored rosters, newest first, optionally only one variant's"""
+        where, params = (" WHERE variant = ?", [variant]) if variant is not None else ("", [])
+        rows = self._query(f"SELECT * FROM runs{where} ORDER BY created_at DESC, id DESC LIMIT ?", [*params, limit])
+        return [
+            {
+                "Run": row["id"], "Generated": datetime.fromtimestamp(row["created_at"]).isoformat(timespec="seconds"),
+                "Variant": row["variant"], "Solver": row["solver"], "Shifts": row["shifts"], "Filled": row["filled"],
+            }
+            for row in rows
+        ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query stored rosters and messages.")
+    parser.add_argument("--db", default=HISTORY_DB, help="history database (default: SCHEDULER_HISTORY_DB)")
+    parser.add_argument("--employee", help="only this employee's shifts")
+    parser.add_argument("--day", help="weekday, e.g. friday")
+    parser.add_argument("--role", help="role, e.g. cashier")
+    parser.add_argument("--since", type=date.fromisoformat, help="rosters generated on or after YYYY-MM-DD")
+    parser.add_argument("--until", type=date.fromisoformat, help="rosters generated before YYYY-MM-DD")
+    parser.add_argument("--variant", choices=["app", "app2"])
+    parser.add_argument("--workload", action="store_true", help="shift counts per employee instead of shifts")
+    parser.add_argument("--limit", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    history = RosterHistory(args.db)
+    if args.workload:
+        rows = history.workload(args.day, args.role, args.since, args.until, args.variant)
+    else:
+        rows = history.shifts(args.employee, args.day, args.role, args.since, args.until, args.variant, args.limit)
+    if rows:
+        writer = csv.DictWriter(sys.stdout, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    history.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,458 @@
+import itertools
+import os
+from collections import deque, namedtuple
+
+from engine import RosterState
+from matching import WILDCARD, compatible, normalize_day, normalize_role, role_fillers
+
+# --- INCREMENTAL (DELTA) SCHEDULING ---
+# A roster kept current one message at a time instead of re-running
+# generate_roster over the whole log:
+#     roster = DeltaRoster(ENGINES["app2"]())
+#     roster.add_message("m1", "We need two cashiers on Friday 9-5")
+#     roster.update_message("m1", "We need three cashiers on Friday 9-5")
+#     roster.remove_message("m1")
+# Every call returns a RosterDiff against the roster before it. A message is
+# parsed on its own (app2's name context starts fresh in each one), and only
+# the records it adds or drops are repaired: an open shift takes a free
+# candidate, otherwise the shortest augmenting path moves a few assigned
+# employees to make room, and a freed employee does the same from the other
+# side. Searches stop after REPAIR_LIMIT candidate checks, so a change costs
+# about the same however large the roster is.
+
+REPAIR_LIMIT = int(os.environ.get("SCHEDULER_REPAIR_LIMIT", "1000"))
+
+# added / removed: [(key, row)]; changed: [(key, old row, new row)]. Keys are
+# stable row ids, ("shift", n) or ("inferred", n), as in DeltaRoster.rows().
+RosterDiff = namedtuple("RosterDiff", ["added", "removed", "changed"])
+_Message = namedtuple("_Message", ["arrival", "shifts", "employees", "blocks", "preferences", "conflicts"])
+
+
+class _MessageState(RosterState):
+    """RosterState of a single message; named preferences are collected, not attached"""
+
+    def __init__(self):
+        super().__init__()
+        self.preferences = []
+
+    def prefer(self, name, line):
+        if name:
+            self.preferences.append((name, line))
+        else:
+            super().prefer(name, line)
+
+
+class _Buckets:
+    """
+    Record ids by normalized (day, role), each bucket in insertion order.
+    related maps a role to the other roles whose records may pair with it
+    (the role hierarchy, read from the querying side).
+    """
+
+    def __init__(self, related=None):
+        self._days = {}  # day -> role -> {id: None}
+        self._related = related or {}
+
+    def add(self, key, rid):
+        self._days.setdefault(key[0], {}).setdefault(key[1], {})[rid] = None
+
+    def discard(self, key, rid):
+        roles = self._days.get(key[0])
+        if roles is None or rid not in roles.get(key[1], ()): return
+        del roles[key[1]][rid]
+        if not roles[key[1]]:
+            del roles[key[1]]
+            if not roles:
+                del self._days[key[0]]
+
+    def near(self, key):
+        """Ids that may pair with a record keyed `key`: same day, same or related role, or a wildcard on either side"""
+        day, role = key
+        days = self._days.values() if day == WILDCARD else [self._days[d] for d in (day, WILDCARD) if d in self._days]
+        for roles in days:
+            if role == WILDCARD:
+                buckets = roles.values()
+            else:
+                buckets = [roles[r] for r in (role, *self._related.get(role, ()), WILDCARD) if r in roles]
+            for bucket in buckets:
+                yield from bucket
+
+
+def _shift_content(shift):
+    return (shift["Day"], shift["Time"], shift["Role"], shift.get("Interval"), shift["Source"])
+
+def _employee_content(emp, preference):
+    return (emp["Name"], emp["Day"], emp["Time"], emp["Role"], emp.get("Interval"), preference)
+
+
+class DeltaRoster:
+    """
+    The roster of one engine's variant, repaired message by message.
+    rows() is the whole Final Roster table and conflicts the unavailability log.
+    Coverage is the maximum-coverage solver's as long as repairs finish within
+    repair_limit checks; which employee takes which shift depends on the
+    order the messages arrived in.
+    """
+
+    def __init__(self, engine, repair_limit=REPAIR_LIMIT):
+        self.engine = engine
+        self.rules = engine.match_rules
+        covers = self.rules.get("role_cover") or {}
+        fillers = role_fillers(covers)
+        covered = {role: filled - {role} for role, filled in covers.items()}
+        self.repair_limit = repair_limit
+        self.shifts = {}              # shift id -> shift record
+        self.employees = {}           # employee id -> employee record
+        self._messages = {}           # message id -> _Message
+        self._arrivals = itertools.count()
+        self._ids = itertools.count()
+        self._keys = {}               # shift or employee id -> normalized (day, role)
+        self._assigned = {}           # shift id -> employee id
+        self._working = {}            # employee id -> shift id
+        self._open = _Buckets(covered)    # unfilled shifts
+        self._demand = _Buckets(covered)  # every shift
+        self._free = _Buckets(fillers)    # available employees without a shift
+        self._staff = _Buckets(fillers)   # every available employee
+        self._available = set()       # ids in _staff
+        self._by_name = {}            # Name -> {employee id: None}
+        self._blocks = {}             # Name -> normalized day -> ids of the messages blocking it
+        self._preferences = {}        # Name -> message id -> (arrival, line)
+        self._own_preference = {}     # employee id -> Preference from its own message
+        self._before = {}             # row key -> row before the current change
+        self._vacated, self._freed = [], []
+
+    # --- PUBLIC API ---
+    def add_message(self, message_id, text):
+        if message_id in self._messages:
+            raise ValueError(f"Message {message_id!r} already added, use update_message")
+        return self._change(message_id, text)
+
+    def update_message(self, message_id, text):
+        if message_id not in self._messages:
+            raise KeyError(message_id)
+        return self._change(message_id, text)
+
+    def remove_message(self, message_id):
+        if message_id not in self._messages:
+            raise KeyError(message_id)
+        return self._change(message_id, None)
+
+    def rows(self):
+        """{row key: row}: explicit shifts in arrival order, then inferred shifts"""
+        keys = [("shift", sid) for sid in self.shifts]
+        keys += [("inferred", eid) for eid in self.employees if eid in self._available and eid not in self._working]
+        return {key: self._row(key) for key in keys}
+
+    @property
+    def conflicts(self):
+        messages = sorted(self._messages.values(), key=lambda message: message.arrival)
+        return [conflict for message in messages for conflict in message.conflicts]
+
+    # --- MESSAGES ---
+    def _parse(self, text):
+        engine = self.engine
+        state = _MessageState()
+        lines = engine.split_lines(text.splitlines())
+        if lines:
+            intents, _, parsed = engine.analyze_lines(lines)
+            engine.sort_lines(lines, intents, parsed, state)
+        return state
+
+    def _change(self, message_id, text):
+        metrics = self.engine.metrics
+        with metrics.phase("parse"):
+            state = _MessageState() if text is None else self._parse(text)
+        with metrics.phase("repair"):
+            self._apply(message_id, state, keep=text is not None)
+            self._repair()
+        metrics.count("messages_applied")
+        return self._diff()
+
+    def _apply(self, message_id, state, keep):
+        old = self._messages.pop(message_id, None)
+        arrival = old.arrival if old else next(self._arrivals)
+
+        # Records equal to ones the message already had keep their ids and assignments
+        kept_shifts, dropped_shifts, new_shifts = self._reuse(
+            old.shifts if old else [], state.shifts,
+            lambda sid: _shift_content(self.shifts[sid]), _shift_content,
+        )
+        kept_employees, dropped_employees, new_employees = self._reuse(
+            old.employees if old else [], state.employees,
+            lambda eid: _employee_content(self.employees[eid], self._own_preference[eid]),
+            lambda emp: _employee_content(emp, emp["Preference"]),
+        )
+        for sid in dropped_shifts:
+            self._drop_shift(sid)
+        for eid in dropped_employees:
+            self._drop_employee(eid)
+
+        blocks = {(name, day) for name, days in state.unavailable.items() for day in days}
+        old_blocks = old.blocks if old else set()
+        for name, day in old_blocks - blocks:
+            self._unblock(name, day, message_id)
+        for name, day in blocks - old_blocks:
+            self._block(name, day, message_id)
+
+        preferences = dict(state.preferences)
+        for name in set(old.preferences if old else ()) | set(preferences):
+            entries = self._preferences.setdefault(name, {})
+            entries.pop(message_id, None)
+            if name in preferences:
+                entries[message_id] = (arrival, preferences[name])
+            elif not entries:
+                del self._preferences[name]
+            self._refresh_preference(name)
+
+        kept_shifts += [self._add_shift(shift) for shift in new_shifts]
+        kept_employees += [self._add_employee(emp) for emp in new_employees]
+        if keep:
+            self._messages[message_id] = _Message(
+                arrival, kept_shifts, kept_employees, blocks, preferences, state.conflicts,
+            )
+
+    @staticmethod
+    def _reuse(old_ids, records, old_key, new_key):
+        """(kept ids, dropped ids, new records): old ids paired with equal new records"""
+        spare = {}
+        for rid in old_ids:
+            spare.setdefault(old_key(rid), deque()).append(rid)
+        kept, new = [], []
+        for record in records:
+            ids = spare.get(new_key(record))
+            if ids:
+                kept.append(ids.popleft())
+            else:
+                new.append(record)
+        return kept, [rid for ids in spare.values() for rid in ids], new
+
+    # --- RECORDS ---
+    def _add_shift(self, shift):
+        sid = next(self._ids)
+        self._touch(("shift", sid))
+        self.shifts[sid] = shift
+        self._keys[sid] = (normalize_day(shift["Day"]), normalize_role(shift["Role"]))
+        self._open.add(self._keys[sid], sid)
+        self._demand.add(self._keys[sid], sid)
+        self._vacated.append(sid)
+        return sid
+
+    def _drop_shift(self, sid):
+        self._touch(("shift", sid))
+        if sid in self._assigned:
+            self._freed.append(self._unassign(sid))
+        key = self._keys.pop(sid)
+        self._open.discard(key, sid)
+        self._demand.discard(key, sid)
+        del self.shifts[sid]
+
+    def _add_employee(self, emp):
+        eid = next(self._ids)
+        self.employees[eid] = emp
+        self._keys[eid] = (normalize_day(emp["Day"]), normalize_role(emp["Role"]))
+        self._own_preference[eid] = emp["Preference"]
+        if emp["Name"]:
+            self._by_name.setdefault(emp["Name"], {})[eid] = None
+            emp["Preference"] = self._preference(emp["Name"]) or emp["Preference"]
+        self._update_availability(eid)
+        return eid
+
+    def _drop_employee(self, eid):
+        self._withdraw(eid)
+        emp = self.employees.pop(eid)
+        del self._keys[eid], self._own_preference[eid]
+        if emp["Name"]:
+            del self._by_name[emp["Name"]][eid]
+            if not self._by_name[emp["Name"]]:
+                del self._by_name[emp["Name"]]
+
+    def _withdraw(self, eid):
+        """Takes an employee out of the pool (and off its shift)"""
+        self._touch_employee(eid)
+        if eid in self._working:
+            self._vacated.append(self._working[eid])
+            self._unassign(self._working[eid])
+        self._free.discard(self._keys[eid], eid)
+        self._staff.discard(self._keys[eid], eid)
+        self._available.discard(eid)
+
+    def _update_availability(self, eid):
+        """Adds an employee to the pool or takes it out, as its blocks now say"""
+        emp = self.employees[eid]
+        available = not self._blocked(emp["Name"], self._keys[eid][0])
+        if available and eid not in self._available:
+            self._touch_employee(eid)
+            self._available.add(eid)
+            self._staff.add(self._keys[eid], eid)
+            self._free.add(self._keys[eid], eid)
+            self._freed.append(eid)
+        elif not available and eid in self._available:
+            self._withdraw(eid)
+
+    # --- UNAVAILABILITY AND PREFERENCES ---
+    def _blocked(self, name, day):
+        days = self._blocks.get(name)
+        return bool(days) and (WILDCARD in days or day in days)
+
+    def _block(self, name, day, message_id):
+        days = self._blocks.setdefault(name, {})
+        days.setdefault(day, set()).add(message_id)
+        if len(days[day]) > 1: return
+        for eid in self._by_name.get(name, ()):
+            self._update_availability(eid)
+            sid = self._working.get(eid)
+            if sid is not None and (day == WILDCARD or self._keys[sid][0] == day):
+                self._vacated.append(sid)
+                self._freed.append(self._unassign(sid))
+
+    def _unblock(self, name, day, message_id):
+        days = self._blocks[name]
+        days[day].discard(message_id)
+        if days[day]: return
+        del days[day]
+        if not days:
+            del self._blocks[name]
+        for eid in self._by_name.get(name, ()):
+            self._update_availability(eid)
+            if eid in self._available and eid not in self._working:
+                self._freed.append(eid)
+
+    def _preference(self, name):
+        entries = self._preferences.get(name)
+        return max(entries.values())[1] if entries else None
+
+    def _refresh_preference(self, name):
+        preference = self._preference(name)
+        for eid in self._by_name.get(name, ()):
+            value = preference or self._own_preference[eid]
+            if self.employees[eid]["Preference"] != value:
+                self._touch_employee(eid)
+                self.employees[eid]["Preference"] = value
+
+    # --- REPAIR ---
+    def _fits(self, sid, eid):
+        emp = self.employees[eid]
+        return compatible(self.shifts[sid], emp, **self.rules) and not self._blocked(emp["Name"], self._keys[sid][0])
+
+    def _assign(self, sid, eid):
+        self._touch(("shift", sid))
+        self._touch_employee(eid)
+        self._assigned[sid], self._working[eid] = eid, sid
+        self.shifts[sid]["Assigned"] = self.employees[eid]
+        self._open.discard(self._keys[sid], sid)
+        self._free.discard(self._keys[eid], eid)
+
+    def _unassign(self, sid):
+        eid = self._assigned.pop(sid)
+        self._touch(("shift", sid))
+        self._touch_employee(eid)
+        del self._working[eid]
+        self.shifts[sid]["Assigned"] = None
+        self._open.add(self._keys[sid], sid)
+        if eid in self._available:
+            self._free.add(self._keys[eid], eid)
+        return eid
+
+    def _repair(self):
+        """Fills the shifts and places the employees the last change left open"""
+        vacated, freed = sorted(set(self._vacated)), sorted(set(self._freed))
+        self._vacated, self._freed = [], []
+        for sid in vacated:
+            if sid in self.shifts and sid not in self._assigned:
+                self._fill(sid)
+        for eid in freed:
+            if eid in self._available and eid not in self._working:
+                self._place(eid)
+
+    def _fill(self, sid):
+        """Gives an open shift a free employee, or makes room along an augmenting path"""
+        for checks, eid in enumerate(self._free.near(self._keys[sid])):
+            if checks >= self.repair_limit: return False
+            if self._fits(sid, eid):
+                self._assign(sid, eid)
+                return True
+        return self._augment(sid, self._staff, self._working, self._fits)
+
+    def _place(self, eid):
+        """Puts a free employee on an open shift, or makes room along an augmenting path"""
+        for checks, sid in enumerate(self._open.near(self._keys[eid])):
+            if checks >= self.repair_limit: return False
+            if self._fits(sid, eid):
+                self._assign(sid, eid)
+                return True
+        return self._augment(eid, self._demand, self._assigned, lambda eid, sid: self._fits(sid, eid))
+
+    def _augment(self, root, partners, partner_of, fits):
+        """
+        Breadth-first search for the shortest alternating path from an
+        unmatched shift (or employee) to an unmatched counterpart; shifts
+        every assignment along it by one. Works from either side: partners
+        holds the other side's ids, partner_of maps a matched one back.
+        """
+        parent = {}
+        queue, seen = deque([root]), {root}
+        checks = 0
+        while queue:
+            node = queue.popleft()
+            for other in partners.near(self._keys[node]):
+                checks += 1
+                if checks > self.repair_limit: return False
+                if other in parent: continue
+                if not fits(node, other): continue
+                parent[other] = node
+                if other not in partner_of:
+                    self._flip(parent, other)
+                    self.engine.metrics.count("augmenting_paths")
+                    return True
+                following = partner_of[other]
+                if following not in seen:
+                    seen.add(following)
+                    queue.append(following)
+        return False
+
+    def _flip(self, parent, end):
+        # Walks back to the root: each node drops its current partner and
+        # takes the one after it on the path, which the previous step freed
+        while end is not None:
+            node = parent[end]
+            if end in self.employees:   # path from a shift: node is a shift
+                matched = self._assigned.get(node)
+                if matched is not None: self._unassign(node)
+                self._assign(node, end)
+            else:                       # path from an employee: node is an employee
+                matched = self._working.get(node)
+                if matched is not None: self._unassign(matched)
+                self._assign(end, node)
+            end = matched
+
+    # --- DIFF ---
+    def _touch(self, key):
+        if key not in self._before:
+            self._before[key] = self._row(key)
+
+    def _touch_employee(self, eid):
+        self._touch(("inferred", eid))
+        if eid in self._working:
+            self._touch(("shift", self._working[eid]))
+
+    def _row(self, key):
+        kind, rid = key
+        if kind == "shift":
+            shift = self.shifts.get(rid)
+            return None if shift is None else self.engine.roster_row(shift)
+        if rid not in self._available or rid in self._working:
+            return None
+        return self.engine.roster_row(self.engine.inferred_shift(self.employees[rid]))
+
+    def _diff(self):
+        added, removed, changed = [], [], []
+        for key, old in self._before.items():
+            new = self._row(key)
+            if old is None and new is not None:
+                added.append((key, new))
+            elif new is None and old is not None:
+                removed.append((key, old))
+            elif old != new:
+                changed.append((key, old, new))
+        self._before = {}
+        return RosterDiff(added, removed, changed)
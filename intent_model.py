@@ -0,0 +1,22 @@
+import numpy as np
+from sklearn.naive_bayes import MultinomialNB
+
+# --- INCREMENTAL INTENT CLASSIFIER ---
+# Imported lazily by engine.build_classifier (and by joblib when an artifact
+# loads), so sklearn stays off the engine's import path.
+
+
+class SeenVocabularyNB(MultinomialNB):
+    """
+    MultinomialNB for hashed token counts that scores only the features seen
+    in training and smooths over those alone. Its probabilities equal a
+    CountVectorizer + MultinomialNB fitted on the same sentences, but
+    partial_fit can add words that the original training set never had.
+    """
+
+    def _update_feature_log_prob(self, alpha):
+        seen = self.feature_count_.sum(axis=0) > 0
+        smoothed_fc = self.feature_count_ + alpha
+        smoothed_cc = self.feature_count_.sum(axis=1) + alpha * seen.sum()
+        # Unseen features add nothing, as words outside a fitted vocabulary would
+        self.feature_log_prob_ = np.where(seen, np.log(smoothed_fc) - np.log(smoothed_cc.reshape(-1, 1)), 0.0)
@@ -0,0 +1,150 @@
+import re
+from bisect import bisect_left, bisect_right
+
+# --- TIME RANGES AS MINUTE INTERVALS ---
+# "9-5", "3-11", "1 to 9", "9:00-5:00", "9am-5pm" -> (start, end) in minutes
+# from midnight. Overnight shifts end past 1440 ("10pm-6am" -> (1320, 1800)).
+
+_CLOCK = r"(?<!\d)(\d{1,2})(?!\d)(?::(\d{2}))?(?:\s*([ap])\.?m\b\.?)?"
+_RANGE = re.compile(rf"{_CLOCK}\s*(?:-|–|—|to|until|till)\s*{_CLOCK}", re.IGNORECASE)
+
+DAY_MINUTES = 24 * 60
+
+def _with_suffix(hour, minute, suffix):
+    return ((hour % 12) + (12 if suffix == "p" else 0)) * 60 + minute
+
+def _infer_start(hour, minute):
+    # Bare shift starts: 6-11 are mornings, 12 is noon, 1-5 are afternoons
+    if hour > 12 or hour == 0: return hour * 60 + minute
+    if hour == 12: return 12 * 60 + minute
+    if hour <= 5: return (hour + 12) * 60 + minute
+    return hour * 60 + minute
+
+def _infer_end(hour, minute, start):
+    # The first reading of a bare end hour that comes after the start
+    if hour > 12 or hour == 0:
+        options = [hour * 60 + minute]
+    else:
+        options = [(hour % 12) * 60 + minute, (hour % 12 + 12) * 60 + minute]
+    for end in options:
+        if end > start:
+            return end
+    return options[0] + DAY_MINUTES
+
+def parse_time_range(text):
+    """
+    Parses a time range into a (start, end) minute interval, or None.
+    Explicit am/pm wins; otherwise bare hours are read as typical shift times
+    ("3-11" -> 15:00-23:00, "9-1" -> 09:00-13:00).
+    """
+    if not text: return None
+    found = _RANGE.search(str(text))
+    if not found: return None
+    h1, m1, s1, h2, m2, s2 = found.groups()
+    h1, h2 = int(h1), int(h2)
+    m1, m2 = int(m1 or 0), int(m2 or 0)
+    s1, s2 = (s1 or "").lower(), (s2 or "").lower()
+    if h1 > 24 or h2 > 24 or m1 > 59 or m2 > 59: return None
+
+    if s1:
+        start = _with_suffix(h1, m1, s1)
+    elif s2:
+        # "9-5pm" / "10-2am": take the end's half unless that starts after it
+        start = _with_suffix(h1, m1, s2)
+        if start >= _with_suffix(h2, m2, s2):
+            start = _with_suffix(h1, m1, "a" if s2 == "p" else "p")
+    else:
+        start = _infer_start(h1, m1)
+
+    if s2:
+        end = _with_suffix(h2, m2, s2)
+        if end <= start: end += DAY_MINUTES
+    else:
+        end = _infer_end(h2, m2, start)
+    return start, end
+
+def remove_time_ranges(text):
+    """Blanks out every time range, e.g. before looking for head counts"""
+    return _RANGE.sub(" ", text)
+
+def contains(outer, inner):
+    return outer[0] <= inner[0] and inner[1] <= outer[1]
+
+
+class IntervalIndex:
+    """
+    Intervals (with a hashable item each) sorted by start, with a max-end
+    segment tree over that order. 'Who contains [s, e]' and 'who overlaps
+    [s, e)' cost O(log n) plus O(log n) per hit. Removal is O(log n); adding
+    after a query rebuilds the tree on the next query.
+    """
+
+    def __init__(self, entries=()):
+        self._entries = {}   # item -> (start, end)
+        self._dirty = True
+        for interval, item in entries:
+            self.add(interval, item)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, item):
+        return item in self._entries
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def add(self, interval, item):
+        self._entries[item] = (interval[0], interval[1])
+        self._dirty = True
+
+    def remove(self, item):
+        del self._entries[item]
+        if self._dirty: return
+        node = self._size + self._slot.pop(item)
+        self._tree[node] = -1
+        node //= 2
+        while node:
+            self._tree[node] = max(self._tree[2 * node], self._tree[2 * node + 1])
+            node //= 2
+
+    def _build(self):
+        ordered = sorted(self._entries.items(), key=lambda entry: entry[1][0])
+        self._items = [item for item, _ in ordered]
+        self._starts = [interval[0] for _, interval in ordered]
+        self._slot = {item: i for i, item in enumerate(self._items)}
+        size = 1
+        while size < len(ordered): size *= 2
+        tree = [-1] * (2 * size)
+        for i, (_, interval) in enumerate(ordered):
+            tree[size + i] = interval[1]
+        for node in range(size - 1, 0, -1):
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+        self._size, self._tree = size, tree
+        self._dirty = False
+
+    def _collect(self, limit, min_end):
+        """Items among the first `limit` starts whose end is >= min_end, by start"""
+        found = []
+        tree, size = self._tree, self._size
+        stack = [(1, 0, size)]
+        while stack:
+            node, lo, hi = stack.pop()
+            if lo >= limit or tree[node] < min_end: continue
+            if node >= size:
+                found.append(self._items[node - size])
+                continue
+            mid = (lo + hi) // 2
+            stack.append((2 * node + 1, mid, hi))
+            stack.append((2 * node, lo, mid))
+        return found
+
+    def containing(self, interval):
+        """Items whose interval covers the whole of `interval`"""
+        if self._dirty: self._build()
+        return self._collect(bisect_right(self._starts, interval[0]), interval[1])
+
+    def overlapping(self, interval):
+        """Items whose interval shares any time with `interval`"""
+        if self._dirty: self._build()
+        return self._collect(bisect_left(self._starts, interval[1]), interval[0] + 1)
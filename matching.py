@@ -0,0 +1,208 @@
+from intervals import contains
+
+# --- DAY AND ROLE KEYS FOR THE MATCHING PHASE ---
+# Shifts and employees are compared by (normalized day, normalized role).
+# Entries with no day, or a "General"/"Any" role, get the WILDCARD key of
+# that axis. RosterStore.compatibility applies the rules to whole columns,
+# compatible() to a single pair (DeltaRoster).
+
+WILDCARD = "*"
+WILDCARD_VALUES = {"", "general", "any", "tbd", "none"}
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+def normalize_day(day):
+    """Reduces free-text days ('on Sunday', 'Friday') to a weekday key"""
+    if day is None: return WILDCARD
+    text = str(day).strip().lower()
+    if text in WILDCARD_VALUES: return WILDCARD
+    for weekday in WEEKDAYS:
+        if weekday in text:
+            return weekday
+    return text
+
+def normalize_role(role):
+    """Case-folds roles; None/'General'/'Any' become the wildcard key"""
+    if role is None: return WILDCARD
+    text = str(role).strip().lower()
+    if text in WILDCARD_VALUES: return WILDCARD
+    return text
+
+def role_fillers(role_cover):
+    """Inverts role_cover: shift role -> the other employee roles that can fill it"""
+    fillers = {}
+    for e_role, roles in (role_cover or {}).items():
+        for s_role in roles:
+            if s_role != e_role:
+                fillers.setdefault(s_role, set()).add(e_role)
+    return fillers
+
+def compatible(shift, emp, general_fills_roles=True, undated_matches_all=True, match_times=False, role_cover=None):
+    """Whether `emp` can work `shift`: RosterStore.compatibility's rules for a single pair"""
+    s_day, e_day = normalize_day(shift["Day"]), normalize_day(emp["Day"])
+    if undated_matches_all:
+        if s_day != WILDCARD and e_day not in (s_day, WILDCARD): return False
+    elif e_day != s_day and (e_day != WILDCARD or s_day == WILDCARD):
+        return False
+    s_role, e_role = normalize_role(shift["Role"]), normalize_role(emp["Role"])
+    if (s_role != WILDCARD and e_role != s_role and not (general_fills_roles and e_role == WILDCARD)
+            and s_role not in (role_cover or {}).get(e_role, ())):
+        return False
+    if not match_times: return True
+    s_time, e_time = shift.get("Time"), emp.get("Time")
+    if s_time == "Any" or e_time == "Any": return True
+    s_interval, e_interval = shift.get("Interval"), emp.get("Interval")
+    if s_interval is not None and e_interval is not None:
+        return contains(e_interval, s_interval)
+    return e_time == s_time
+
+
+# --- ASSIGNMENT SOLVERS ---
+# greedy:     first employee that fits each shift, in list order
+# matching:   maximum coverage via Hopcroft-Karp on the compatibility graph
+# preference: maximum coverage, then as many Preference matches as possible
+#             (min-cost assignment solved by scipy's sparse LAPJV)
+SOLVERS = ("greedy", "matching", "preference")
+
+def hopcroft_karp(adjacency, n_right):
+    """
+    Maximum bipartite matching in O(E * sqrt(V)). adjacency[u] lists the right
+    vertices of left vertex u. Returns the matched right vertex (or -1) per
+    left vertex. Starts from the greedy first-fit matching, so the result
+    only moves people where that adds coverage.
+    """
+    n_left = len(adjacency)
+    match_left = [-1] * n_left
+    match_right = [-1] * n_right
+
+    for u, neighbours in enumerate(adjacency):
+        for v in neighbours:
+            if match_right[v] == -1:
+                match_left[u] = v
+                match_right[v] = u
+                break
+
+    unreachable = n_left + 1
+    while True:
+        # BFS: layer the graph from every free left vertex
+        dist = [unreachable] * n_left
+        queue = [u for u in range(n_left) if match_left[u] == -1]
+        for u in queue:
+            dist[u] = 0
+        found_free = False
+        head = 0
+        while head < len(queue):
+            u = queue[head]
+            head += 1
+            for v in adjacency[u]:
+                w = match_right[v]
+                if w == -1:
+                    found_free = True
+                elif dist[w] == unreachable:
+                    dist[w] = dist[u] + 1
+                    queue.append(w)
+        if not found_free:
+            return match_left
+
+        # DFS (iterative): vertex-disjoint augmenting paths along the layers
+        next_edge = [0] * n_left
+        for root in range(n_left):
+            if match_left[root] != -1: continue
+            stack = [root]
+            via = []  # via[i] is the right vertex leading from stack[i] to stack[i + 1]
+            while stack:
+                u = stack[-1]
+                neighbours = adjacency[u]
+                advanced = False
+                while next_edge[u] < len(neighbours):
+                    v = neighbours[next_edge[u]]
+                    next_edge[u] += 1
+                    w = match_right[v]
+                    if w == -1:
+                        via.append(v)
+                        for left, right in zip(stack, via):
+                            match_left[left] = right
+                            match_right[right] = left
+                        stack = []
+                        advanced = True
+                        break
+                    if dist[w] == dist[u] + 1:
+                        via.append(v)
+                        stack.append(w)
+                        advanced = True
+                        break
+                if not advanced:
+                    dist[u] = unreachable
+                    stack.pop()
+                    if via: via.pop()
+
+def preference_match(shift, emp):
+    """True if the employee's stated preference mentions the shift's day, role or time"""
+    preference = emp.get("Preference")
+    if not preference: return False
+    text = preference.lower()
+    day, role = normalize_day(shift["Day"]), normalize_role(shift["Role"])
+    if day != WILDCARD and day in text: return True
+    if role != WILDCARD and role in text: return True
+    time = shift.get("Time")
+    return bool(time) and time != "Any" and str(time).lower() in text
+
+def min_cost_assignment(adjacency, shifts, employees):
+    """
+    Maximum-coverage assignment that also maximizes Preference matches.
+    Every shift gets a private 'unfilled' column priced above any possible
+    preference gain, so coverage always wins and a full matching always exists.
+    """
+    import numpy as np
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import min_weight_full_bipartite_matching
+
+    n_shifts, n_employees = len(adjacency), len(employees)
+    if n_shifts == 0: return []
+    unfilled_cost = n_shifts + 3
+    preferring = {position for position, emp in enumerate(employees) if emp.get("Preference")}
+
+    # Shifts sharing an adjacency list share its columns and weights
+    edges_for = {}
+    cols, weights = [], []
+    for i, neighbours in enumerate(adjacency):
+        edges = edges_for.get(id(neighbours))
+        if edges is None:
+            edge_weights = np.full(len(neighbours), 2, dtype=np.int64)
+            for j, v in enumerate(neighbours):
+                if v in preferring and preference_match(shifts[i], employees[v]):
+                    edge_weights[j] = 1
+            edges = edges_for[id(neighbours)] = (np.asarray(neighbours, dtype=np.int64), edge_weights)
+        cols += [edges[0], [n_employees + i]]
+        weights += [edges[1], [unfilled_cost]]
+
+    rows = np.repeat(np.arange(n_shifts), [len(neighbours) + 1 for neighbours in adjacency])
+    cols, weights = np.concatenate(cols), np.concatenate(weights)
+    graph = csr_matrix((weights, (rows, cols)), shape=(n_shifts, n_employees + n_shifts))
+    row_ind, col_ind = min_weight_full_bipartite_matching(graph)
+    match = [-1] * n_shifts
+    for i, v in zip(row_ind, col_ind):
+        if v < n_employees:
+            match[i] = int(v)
+    return match
+
+def solve_assignment(adjacency, shifts, employees, solver="matching"):
+    """
+    Runs the matching or preference solver on a compatibility graph whose
+    identical shifts share one adjacency list. Returns the employee position
+    (or -1) per shift.
+    """
+    if solver == "matching":
+        match = hopcroft_karp(adjacency, len(employees))
+    else:
+        match = min_cost_assignment(adjacency, shifts, employees)
+
+    # Identical shifts share an adjacency list and are interchangeable: keep
+    # the filled ones first so the roster reads like the request did
+    groups = {}
+    for i, neighbours in enumerate(adjacency):
+        groups.setdefault(id(neighbours), []).append(i)
+    for members in groups.values():
+        filled = [match[i] for i in members if match[i] != -1]
+        for k, i in enumerate(members):
+            match[i] = filled[k] if k < len(filled) else -1
+    return match
@@ -0,0 +1,117 @@
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# --- PER-PHASE TIMERS, COUNTERS AND PROFILING ---
+# Every engine carries a PhaseMetrics: wall time per phase (load_resources,
+# parse, sort, matching, inference, render, ...) and counters (lines, cache
+# hits, candidate pairs, shifts filled). log() writes them as one JSON line to
+# the "scheduler.metrics" logger; set SCHEDULER_METRICS_LOG to a file path, or
+# "-" for stderr, to have the apps emit them without any logging setup.
+
+logger = logging.getLogger("scheduler.metrics")
+METRICS_LOG = os.environ.get("SCHEDULER_METRICS_LOG")
+PROFILERS = ("cprofile", "pyinstrument")
+
+def configure_log(target=METRICS_LOG):
+    """Sends metrics log lines, bare JSON, to `target` (a path, or '-' for stderr)"""
+    if not target or logger.handlers: return
+    handler = logging.StreamHandler(sys.stderr) if target == "-" else logging.FileHandler(target, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+class PhaseMetrics:
+    """
+    Wall-clock seconds per phase and named counters, accumulated across calls.
+    Updates take a lock: the service's worker threads share one engine's metrics.
+    """
+
+    def __init__(self):
+        self.seconds = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.seconds[name] = self.seconds.get(name, 0.0) + elapsed
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def phase_rows(self):
+        with self._lock:
+            return [{"Phase": name, "ms": round(seconds * 1000, 2)} for name, seconds in self.seconds.items()]
+
+    def counter_rows(self):
+        with self._lock:
+            return [{"Counter": name, "Value": value} for name, value in self.counters.items()]
+
+    def as_dict(self):
+        with self._lock:
+            return {"seconds": dict(self.seconds), "counters": dict(self.counters)}
+
+    def log(self, **context):
+        """Emits one 'roster_metrics' JSON log line; `context` adds fields (variant, solver, ...)"""
+        configure_log()
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({"event": "roster_metrics", "ts": time.time(), **context, **self.as_dict()}))
+
+
+class Profile:
+    """Filled in by profiling(): the text report of the profiled block"""
+    report = None
+
+
+@contextmanager
+def profiling(mode=None):
+    """
+    Profiles the block with cProfile or pyinstrument (mode None: no-op).
+    The text report is on the yielded Profile once the block exits.
+    """
+    profile = Profile()
+    if mode is None:
+        yield profile
+
+    elif mode == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield profile
+        finally:
+            profiler.disable()
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(40)
+            profile.report = stream.getvalue()
+
+    elif mode == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise RuntimeError("pyinstrument is not installed (pip install pyinstrument)") from None
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield profile
+        finally:
+            profiler.stop()
+            profile.report = profiler.output_text()
+
+    else:
+        raise ValueError(f"Unknown profiler {mode!r}, expected one of {PROFILERS}")
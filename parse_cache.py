@@ -0,0 +1,57 @@
+import os
+import threading
+from collections import OrderedDict
+
+# --- PER-LINE PARSE CACHE ---
+# (intent, confidence, details) per line, keyed by the engine variant, the
+# model fingerprint and the whitespace-normalized text. Entries are context
+# free: app2's "last_person" carry-over is applied after lookup, so one entry
+# serves the line whoever spoke before it. The cache lives at module level,
+# so it survives Streamlit reruns and is shared by every session in the process.
+
+PARSE_CACHE_SIZE = int(os.environ.get("SCHEDULER_PARSE_CACHE_SIZE", "10000"))
+
+def normalize_line(line):
+    """'  Bob   is free ' -> 'Bob is free' (case is kept, NER depends on it)"""
+    return " ".join(line.split())
+
+
+class ParseCache:
+    """Thread-safe LRU mapping of cache keys to parse results, bounded by entry count"""
+
+    def __init__(self, maxsize=PARSE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        if self.maxsize <= 0: return
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+# Shared by every engine in the process
+PARSE_CACHE = ParseCache()
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import re
+
+from matching import WILDCARD, normalize_role
+
+# --- ROLE TAXONOMY ---
+# roles.json lists each variant's canonical roles, the words that name them
+# ("register" -> Cashier) and the roles each one can also fill ("includes":
+# a Supervisor covers Cashier shifts). Extraction finds every mention in one
+# PhraseMatcher pass over the doc (a dictionary walk over the words on the
+# fast path); the matching phase reads the hierarchy from `covers` instead
+# of comparing role strings.
+
+ROLES_CONFIG = os.environ.get(
+    "SCHEDULER_ROLES_CONFIG", os.path.join(os.path.dirname(os.path.abspath(__file__)), "roles.json")
+)
+
+_WORD = re.compile(r"\w+")
+
+def _term(text):
+    """Lowercased words of a synonym, single-spaced: the key mentions() looks up"""
+    return " ".join(_WORD.findall(text.lower()))
+
+def _closure(role, includes):
+    """`role` and every role it includes, directly or through another role"""
+    found, stack = set(), [role]
+    while stack:
+        current = stack.pop()
+        if current in found: continue
+        found.add(current)
+        stack.extend(includes[current])
+    return found
+
+
+class RoleTaxonomy:
+    """
+    One variant's roles. terms maps every synonym to its canonical role;
+    covers maps a normalized role to the normalized roles it can fill (its
+    own included), closed over the includes hierarchy. default is the role
+    of a line that mentions none.
+    """
+
+    def __init__(self, name, roles, default=None):
+        self.name = name
+        self.default = default
+        self.terms = {}
+        for canonical, spec in roles.items():
+            for synonym in (canonical, *spec.get("synonyms", ())):
+                term = _term(synonym)
+                if not term:
+                    raise ValueError(f"Role synonym {synonym!r} of {canonical!r} has no words")
+                if self.terms.setdefault(term, canonical) != canonical:
+                    raise ValueError(f"Role synonym {synonym!r} names both {self.terms[term]!r} and {canonical!r}")
+        self.longest = max((term.count(" ") + 1 for term in self.terms), default=0)
+
+        includes = {canonical: tuple(spec.get("includes", ())) for canonical, spec in roles.items()}
+        for canonical, included in includes.items():
+            for role in included:
+                if role not in includes:
+                    raise ValueError(f"Unknown role {role!r} included by {canonical!r}, expected one of {tuple(roles)}")
+        self.covers = {
+            normalize_role(canonical): frozenset(normalize_role(role) for role in _closure(canonical, includes))
+            for canonical in roles
+        }
+        # Parses depend on the taxonomy, so it is part of the engines' model_id
+        self.digest = hashlib.sha256(json.dumps([default, roles], sort_keys=True).encode()).hexdigest()[:12]
+
+    def pick(self, found):
+        """The role of a line: its first specific mention, else its first mention, else the default"""
+        for role in found:
+            if normalize_role(role) != WILDCARD:
+                return role
+        return found[0] if found else self.default
+
+    def role_of(self, word):
+        """Canonical role named by a single word, or None"""
+        return self.terms.get(word.lower())
+
+    def mentions(self, text):
+        """Canonical roles named in raw text, in order; longest synonym first, no spaCy needed"""
+        words = _WORD.findall(text.lower())
+        found, start = [], 0
+        while start < len(words):
+            for size in range(min(self.longest, len(words) - start), 0, -1):
+                role = self.terms.get(" ".join(words[start:start + size]))
+                if role is not None:
+                    found.append(role)
+                    start += size
+                    break
+            else:
+                start += 1
+        return found
+
+    def phrase_matcher(self, nlp):
+        """PhraseMatcher over nlp's vocab: every synonym, case-insensitive, labelled with its canonical role"""
+        from spacy.matcher import PhraseMatcher
+
+        by_role = {}
+        for term, canonical in self.terms.items():
+            by_role.setdefault(canonical, []).append(term)
+        matcher = PhraseMatcher(nlp.vocab, attr="LOWER")
+        for canonical, terms in by_role.items():
+            matcher.add(canonical, list(nlp.tokenizer.pipe(terms)))
+        return matcher
+
+    def in_doc(self, doc, matcher):
+        """Canonical roles mentioned in a doc, in order, from one pass of phrase_matcher()"""
+        from spacy.util import filter_spans
+
+        return [span.label_ for span in filter_spans(matcher(doc, as_spans=True))]
+
+
+def load_taxonomy(name, path=ROLES_CONFIG):
+    """Variant `name`'s RoleTaxonomy from a roles.json file"""
+    with open(path, encoding="utf-8") as config_file:
+        config = json.load(config_file)
+    if name not in config:
+        raise ValueError(f"Unknown role taxonomy {name!r}, expected one of {tuple(config)}")
+    section = config[name]
+    return RoleTaxonomy(name, section["roles"], section.get("default"))
@@ -0,0 +1,66 @@
+import io
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import streamlit as st
+
+from streaming import EXPORT_FORMATS, write_table
+
+# --- ROSTER GRID ---
+# The Final Roster as an Arrow table (engine.roster_table) in st.dataframe's
+# virtualized grid, a page at a time, filtered and sorted with
+# pyarrow.compute. It runs as a fragment, so filtering, paging and
+# downloading rerun the grid only, not the whole roster build.
+
+PAGE_SIZE = 1000
+FILTERS = ("Day", "Role", "Status")
+MIME_TYPES = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+def filter_roster(table, selections):
+    """Rows whose columns hold one of the selected values ({column: values}; empty means any)"""
+    for column, values in selections.items():
+        if values:
+            table = table.filter(pc.is_in(table.column(column), value_set=pa.array(values, pa.string())))
+    return table
+
+def sort_roster(table, column, descending=False):
+    """Stable sort by a dictionary column's labels, nulls last (pyarrow can't sort dictionaries itself)"""
+    values = table.column(column).combine_chunks()
+    ranks = pc.rank(values.dictionary, sort_keys="ascending", tiebreaker="dense")
+    order = pc.array_sort_indices(pc.take(ranks, values.indices), order="descending" if descending else "ascending")
+    return table.take(order)
+
+def export(table, fmt):
+    sink = io.BytesIO()
+    write_table(table, sink, fmt)
+    return sink.getvalue()
+
+def options(table, column):
+    return sorted({value for value in table.column(column).unique().to_pylist() if value is not None})
+
+
+@st.fragment
+def render_roster(table, key="roster"):
+    """Filters, sort order, the current page of `table` and CSV/Parquet downloads of the filtered rows"""
+    selections = {
+        column: container.multiselect(column, options(table, column), key=f"{key}_{column}")
+        for column, container in zip(FILTERS, st.columns(len(FILTERS)))
+    }
+    view = filter_roster(table, selections)
+
+    sort_col, order_col, page_col = st.columns([2, 1, 1])
+    sort_by = sort_col.selectbox("Sort by", [None, *table.column_names], key=f"{key}_sort",
+                                 format_func=lambda column: column or "Schedule order")
+    descending = order_col.toggle("Descending", key=f"{key}_descending")
+    if sort_by:
+        view = sort_roster(view, sort_by, descending)
+    pages = max(1, -(-view.num_rows // PAGE_SIZE))
+    page = page_col.selectbox("Page", range(1, pages + 1), key=f"{key}_page")
+
+    st.caption(f"{view.num_rows:,} of {table.num_rows:,} shifts")
+    st.dataframe(view.slice((page - 1) * PAGE_SIZE, PAGE_SIZE), hide_index=True)
+    for fmt, container in zip(EXPORT_FORMATS, st.columns(len(EXPORT_FORMATS))):
+        container.download_button(
+            f"Download {fmt.upper()}", export(view, fmt), file_name=f"roster.{fmt}",
+            mime=MIME_TYPES[fmt], on_click="ignore", key=f"{key}_{fmt}",
+        )
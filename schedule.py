@@ -0,0 +1,127 @@
+import argparse
+import importlib.util
+import sys
+
+from engine import ENGINES, PARALLEL_MIN_LINES, PARALLEL_MIN_SHIFTS, PARSE_BATCH_SIZE, PARSE_PROCESSES, SOLVERS
+from history import RosterHistory
+from metrics import PROFILERS, configure_log, profiling
+from streaming import (
+    CHUNK_SIZE, EXPORT_FORMATS, FORMATS, detect_format, open_input, read_messages, stream_roster, write_rows, write_table,
+)
+
+# --- HEADLESS ROSTER BUILDS (e.g. from cron) ---
+#     python schedule.py --input messages.txt --output roster.csv
+# Reads one message per line ('-' for stdin), writes the Final Roster as CSV
+# ('-' for stdout) and the conflict log to stderr. Streamlit is never imported.
+# --stream reads text/CSV/JSONL lazily and keeps memory flat for huge logs:
+#     python schedule.py --stream --input chat_export.jsonl --output roster.csv
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Generate a roster from staff messages without the UI.")
+    parser.add_argument("--input", "-i", default="-", help="message file, one message per line (default: stdin)")
+    parser.add_argument("--output", "-o", default="-", help="roster CSV path (default: stdout)")
+    parser.add_argument("--output-format", choices=EXPORT_FORMATS,
+                        help="roster file format (default: parquet for *.parquet, csv otherwise)")
+    parser.add_argument("--variant", choices=sorted(ENGINES), default="app2",
+                        help="app: app.py's pipeline, app2: app2.py's pipeline (default)")
+    parser.add_argument("--solver", choices=SOLVERS, default="greedy", help="assignment solver")
+    parser.add_argument("--batch-size", type=int, default=PARSE_BATCH_SIZE, help="lines per nlp.pipe batch")
+    parser.add_argument("--processes", type=int, default=PARSE_PROCESSES, help="worker processes for parsing large inputs")
+    parser.add_argument("--parallel-min-lines", type=int, default=PARALLEL_MIN_LINES,
+                        help="parse in worker processes once this many new lines arrive at once")
+    parser.add_argument("--parallel-min-shifts", type=int, default=PARALLEL_MIN_SHIFTS,
+                        help="solve independent parts of the roster in worker processes from this many shifts")
+    parser.add_argument("--no-templates", dest="templates", action="store_false",
+                        help="send every line through the classifier and spaCy (no regex fast path)")
+    parser.add_argument("--stats", action="store_true", help="print template hit rate and parse counts to stderr")
+    parser.add_argument("--metrics-log", help="append per-phase timings and counters as a JSON line to this file ('-': stderr)")
+    parser.add_argument("--profile", choices=PROFILERS, help="profile the run and print the report to stderr")
+    parser.add_argument("--stream", action="store_true", help="process the input in chunks, keeping only the parsed records")
+    parser.add_argument("--format", choices=FORMATS, help="input format for --stream (default: from the file extension)")
+    parser.add_argument("--field", help="CSV column / JSON key holding the message (default: message/text/body/content)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="messages per chunk for --stream")
+    parser.add_argument("--history", metavar="DB",
+                        help="SQLite history: reuse parses stored there, record new ones and the roster")
+    return parser
+
+
+def read_lines(path):
+    if path == "-":
+        return sys.stdin.read().split("\n")
+    with open(path, encoding="utf-8") as handle:
+        return handle.read().split("\n")
+
+
+def write_roster(rows, path):
+    handle = sys.stdout if path == "-" else open(path, "w", encoding="utf-8", newline="")
+    try:
+        return write_rows(rows, handle)
+    finally:
+        if handle is not sys.stdout:
+            handle.close()
+
+
+def write_roster_table(table, path, fmt):
+    """Writes engine.roster_table() output column-wise (Parquet, or CSV through Arrow)"""
+    return write_table(table, sys.stdout.buffer if path == "-" else path, fmt)
+
+
+def report_conflict(conflict):
+    print(conflict.replace("**", ""), file=sys.stderr)
+
+
+def report_stats(engine):
+    counters = engine.metrics.counters
+    print(
+        f"templated: {counters.get('lines_templated', 0)} ({engine.template_hit_rate:.1%} of parsed lines), "
+        f"model: {counters.get('lines_parsed', 0)}, cache: {counters.get('cache_hits', 0)}, "
+        f"history: {counters.get('history_hits', 0)}",
+        file=sys.stderr,
+    )
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.profile == "pyinstrument" and importlib.util.find_spec("pyinstrument") is None:
+        parser.error("--profile pyinstrument needs pyinstrument (pip install pyinstrument)")
+    output_format = args.output_format or ("parquet" if args.output.lower().endswith(".parquet") else "csv")
+    if args.stream and output_format != "csv":
+        parser.error("--stream writes rows as they are produced, so its output is CSV")
+    engine = ENGINES[args.variant](
+        solver=args.solver, batch_size=args.batch_size,
+        processes=args.processes, parallel_min_lines=args.parallel_min_lines, use_templates=args.templates,
+        parallel_min_shifts=args.parallel_min_shifts,
+        history=RosterHistory(args.history) if args.history else None,
+    )
+
+    configure_log(args.metrics_log)
+
+    with profiling(args.profile) as profile:
+        if args.stream:
+            fmt = args.format or detect_format(args.input)
+            with open_input(args.input) as handle:
+                messages = read_messages(handle, fmt, args.field)
+                rows = stream_roster(engine, messages, args.chunk_size, on_conflict=report_conflict)
+                write_roster(rows, args.output)
+        else:
+            shifts, conflicts, employees, intent_log = engine.generate_roster(read_lines(args.input))
+            with engine.metrics.phase("render"):
+                if output_format == "csv":
+                    write_roster(engine.roster_rows(shifts), args.output)
+                else:
+                    write_roster_table(engine.roster_table(shifts), args.output, output_format)
+            for conflict in conflicts:
+                report_conflict(conflict)
+
+    if args.stats:
+        report_stats(engine)
+    if profile.report:
+        print(profile.report, file=sys.stderr)
+    engine.metrics.log(variant=args.variant, solver=args.solver, stream=args.stream)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
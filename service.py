@@ -0,0 +1,370 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from engine import ENGINES, PARSE_BATCH_SIZE, load_resources
+from parse_cache import PARSE_CACHE
+
+# --- ASYNC HTTP SERVICE ---
+#     python service.py --port 8080
+#     curl -s localhost:8080/schedule -d '{"messages": ["We need a cashier on Friday 9-5", "Bob can work Friday 9-5"]}'
+# Standard-library asyncio, no web framework. Lines that need the models
+# wait in a MicroBatcher for up to max_wait seconds (or max_batch lines), so
+# concurrent requests share one predict_proba and one nlp.pipe call. Model
+# calls, sorting and matching run in worker threads; the event loop only
+# reads requests and writes responses.
+
+BATCH_MAX = int(os.environ.get("SCHEDULER_BATCH_MAX", str(PARSE_BATCH_SIZE)))
+BATCH_WAIT_MS = float(os.environ.get("SCHEDULER_BATCH_WAIT_MS", "5"))
+MAX_BODY = 16 * 1024 * 1024
+
+
+class MicroBatcher:
+    """
+    Coalesces submit() calls into one call of function(items) -> results,
+    run in `executor`. A batch goes out once it holds max_batch items or
+    max_wait seconds after its first item; batches run one at a time, and
+    items that arrive meanwhile go out together as soon as it finishes.
+    """
+
+    def __init__(self, function, max_batch=BATCH_MAX, max_wait=BATCH_WAIT_MS / 1000, executor=None):
+        self.function = function
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.executor = executor
+        self.batches = 0
+        self.items = 0
+        self._pending = []     # (item, future)
+        self._timer = None
+        self._running = False
+
+    async def submit(self, item):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+        # While a batch runs, new items wait for it to finish instead
+        if not self._running:
+            if len(self._pending) >= self.max_batch:
+                self._start()
+            elif self._timer is None:
+                self._timer = asyncio.get_running_loop().call_later(self.max_wait, self._start)
+        return await future
+
+    def stats(self):
+        return {"batches": self.batches, "items": self.items, "mean_batch": self.items / self.batches if self.batches else 0}
+
+    def _start(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._running or not self._pending: return
+        batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+        self._running = True
+        asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch):
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self.function, [item for item, _ in batch],
+            )
+        except Exception as error:
+            for _, future in batch:
+                if not future.done(): future.set_exception(error)
+        else:
+            for (_, future), result in zip(batch, results):
+                if not future.done(): future.set_result(result)
+        finally:
+            self.batches += 1
+            self.items += len(batch)
+            self._running = False
+            self._start()
+
+
+class SchedulerService:
+    """
+    classify / parse / schedule over the engines' shared models. handle() is
+    the whole HTTP surface: (method, path, body bytes) -> (status, payload).
+    """
+
+    def __init__(self, variants=tuple(ENGINES), max_batch=BATCH_MAX, max_wait=BATCH_WAIT_MS / 1000,
+                 executor=None, parse_cache=PARSE_CACHE):
+        for variant in variants:
+            if variant not in ENGINES:
+                raise ValueError(f"Unknown variant {variant!r}, expected one of {tuple(ENGINES)}")
+        self.executor = executor or ThreadPoolExecutor(thread_name_prefix="scheduler")
+        # One parsing engine per variant; every request shares it (and its batches)
+        self.engines = {variant: ENGINES[variant](processes=1, parse_cache=parse_cache) for variant in variants}
+        self.classifiers, self.parsers = {}, {}
+        for variant, engine in self.engines.items():
+            self.classifiers[variant] = MicroBatcher(_classify_batch(engine), max_batch, max_wait, self.executor)
+            self.parsers[variant] = MicroBatcher(_parse_batch(engine), max_batch, max_wait, self.executor)
+        self.routes = {
+            ("POST", "/classify"): self.classify,
+            ("POST", "/parse"): self.parse,
+            ("POST", "/schedule"): self.schedule,
+            ("POST", "/correct"): self.correct,
+            ("GET", "/health"): self.health,
+            ("GET", "/metrics"): self.metrics,
+        }
+
+    async def start(self):
+        """Loads every variant's models before the first request needs them"""
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, load_resources, ENGINES[v]) for v in self.engines))
+
+    async def handle(self, method, path, body=b""):
+        path = path.split("?", 1)[0]
+        route = self.routes.get((method, path))
+        if route is None:
+            known = any(path == route_path for _, route_path in self.routes)
+            status = HTTPStatus.METHOD_NOT_ALLOWED if known else HTTPStatus.NOT_FOUND
+            return status, {"error": f"{method} {path}: {status.phrase}"}
+        try:
+            payload = json.loads(body) if body else {}
+        except ValueError as error:
+            return HTTPStatus.BAD_REQUEST, {"error": f"Invalid JSON: {error}"}
+        if not isinstance(payload, dict):
+            return HTTPStatus.BAD_REQUEST, {"error": "Request body must be a JSON object"}
+        try:
+            return HTTPStatus.OK, await route(payload)
+        except ValueError as error:
+            return HTTPStatus.BAD_REQUEST, {"error": str(error)}
+
+    # --- ENDPOINTS ---
+    async def classify(self, payload):
+        """{"lines": [...], "variant"} -> intent and confidence per line"""
+        variant, lines = self._variant(payload), _strings(payload, "lines")
+        results = await asyncio.gather(*(self.classifiers[variant].submit(line) for line in lines))
+        return {
+            "variant": variant,
+            "results": [
+                {"line": line, "intent": intent, "confidence": confidence}
+                for line, (intent, confidence) in zip(lines, results)
+            ],
+        }
+
+    async def parse(self, payload):
+        """{"lines": [...], "variant"} -> intent, confidence and details per (split) line"""
+        variant = self._variant(payload)
+        lines, intents, confidences, parsed = await self._analyze(variant, _strings(payload, "lines"))
+        return {
+            "variant": variant,
+            "results": [
+                {"line": line, "intent": intent, "confidence": confidence, "details": details}
+                for line, intent, confidence, details in zip(lines, intents, confidences, parsed)
+            ],
+        }
+
+    async def schedule(self, payload):
+        """{"messages": [...], "variant", "solver"} -> roster rows, conflicts and per-phase metrics"""
+        variant = self._variant(payload)
+        solver = payload.get("solver", "greedy")
+        engine = ENGINES[variant](solver, processes=1)
+        lines, intents, confidences, parsed = await self._analyze(variant, _strings(payload, "messages"))
+
+        def build():
+            with engine.metrics.phase("sort"):
+                state = engine.sort_lines(lines, intents, parsed)
+            store = engine.schedule(state.shifts, state.employees, state.unavailable)
+            with engine.metrics.phase("render"):
+                rows = engine.roster_rows(store.shifts)
+            return rows, state.conflicts
+
+        rows, conflicts = await asyncio.get_running_loop().run_in_executor(self.executor, build)
+        return {
+            "variant": variant,
+            "solver": solver,
+            "roster": rows,
+            "conflicts": conflicts,
+            "intents": [
+                {"line": line, "intent": intent, "confidence": confidence}
+                for line, intent, confidence in zip(lines, intents, confidences)
+            ],
+            "metrics": engine.metrics.as_dict(),
+        }
+
+    async def correct(self, payload):
+        """{"corrections": [{"line", "intent"}], "variant"} -> the corrected model's version"""
+        variant = self._variant(payload)
+        corrections = payload.get("corrections")
+        if not isinstance(corrections, list) or not all(
+            isinstance(c, dict) and isinstance(c.get("line"), str) and isinstance(c.get("intent"), str) for c in corrections
+        ):
+            raise ValueError("'corrections' must be a list of {\"line\": str, \"intent\": str} objects")
+        engine = self.engines[variant]
+        pairs = [(c["line"], c["intent"]) for c in corrections]
+        version = await asyncio.get_running_loop().run_in_executor(self.executor, engine.correct_intents, pairs)
+        return {"variant": variant, "version": version}
+
+    async def health(self, payload):
+        return {"status": "ok", "variants": list(self.engines), "models": {v: e.model_id for v, e in self.engines.items()}}
+
+    async def metrics(self, payload):
+        return {
+            variant: {
+                "classify_batches": self.classifiers[variant].stats(),
+                "parse_batches": self.parsers[variant].stats(),
+                **engine.metrics.as_dict(),
+            }
+            for variant, engine in self.engines.items()
+        }
+
+    # --- HELPERS ---
+    def _variant(self, payload):
+        variant = payload.get("variant", "app2")
+        if not isinstance(variant, str) or variant not in self.engines:
+            raise ValueError(f"Unknown variant {variant!r}, expected one of {tuple(self.engines)}")
+        return variant
+
+    async def _analyze(self, variant, lines):
+        """engine.analyze_lines with the model calls going through the shared batchers"""
+        engine = self.engines[variant]
+        loop = asyncio.get_running_loop()
+        lines = engine.split_lines(lines)
+        texts, entries, pending = await loop.run_in_executor(self.executor, engine.lookup_lines, lines)
+        missing = [text for text in pending if entries[text] is None]
+        classified = await asyncio.gather(*(self.classifiers[variant].submit(text) for text in missing))
+        parsed = await asyncio.gather(*(
+            self.parsers[variant].submit((text, intent)) for text, (intent, _) in zip(missing, classified)
+        ))
+        for text, (intent, confidence), details in zip(missing, classified, parsed):
+            entries[text] = (intent, confidence, details)
+        # Cache and history writes happen off the event loop, like the lookups
+        intents, confidences, parsed = await loop.run_in_executor(
+            self.executor, engine.finish_lines, texts, entries, pending,
+        )
+        return lines, intents, confidences, parsed
+
+
+def _strings(payload, field):
+    values = payload.get(field)
+    if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+        raise ValueError(f"{field!r} must be a list of strings")
+    return values
+
+def _classify_batch(engine):
+    def classify(lines):
+        with engine.metrics.phase("classify"):
+            return list(zip(*engine.classify_lines(lines)))
+    return classify
+
+def _parse_batch(engine):
+    def parse(items):
+        lines, intents = map(list, zip(*items))
+        with engine.metrics.phase("extract"):
+            return engine.parse_docs(lines, intents)
+    return parse
+
+
+class LocalClient:
+    """
+    Calls a SchedulerService in-process, without a socket: same routing,
+    JSON bodies and status codes as over HTTP. Returns (status, payload).
+    """
+
+    def __init__(self, service):
+        self.service = service
+
+    async def get(self, path):
+        return await self._call("GET", path, b"")
+
+    async def post(self, path, payload):
+        return await self._call("POST", path, json.dumps(payload).encode("utf-8"))
+
+    async def _call(self, method, path, body):
+        status, payload = await self.service.handle(method, path, body)
+        return int(status), json.loads(json.dumps(payload))
+
+
+# --- HTTP/1.1 FRONT END ---
+async def serve(service, host="127.0.0.1", port=8080):
+    """Starts the service and returns the listening asyncio Server"""
+    await service.start()
+    return await asyncio.start_server(lambda reader, writer: _connection(service, reader, writer), host, port)
+
+async def _connection(service, reader, writer):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line.strip(): break
+            try:
+                method, target, version = request_line.decode("latin-1").split()
+            except ValueError:
+                await _respond(writer, HTTPStatus.BAD_REQUEST, {"error": "Malformed request line"}, False)
+                break
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""): break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+
+            try:
+                length = int(headers.get("content-length") or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                await _respond(writer, HTTPStatus.BAD_REQUEST, {"error": "Invalid Content-Length"}, False)
+                break
+            if length > MAX_BODY:
+                await _respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "Request body too large"}, False)
+                break
+            body = await reader.readexactly(length) if length else b""
+            status, payload = await service.handle(method, target, body)
+            await _respond(writer, status, payload, keep_alive)
+            if not keep_alive: break
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    except Exception as error:
+        # A bug, not a bad request: answer it rather than drop the connection
+        try:
+            await _respond(writer, HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"Internal error: {type(error).__name__}"}, False)
+        except ConnectionError:
+            pass
+    finally:
+        writer.close()
+
+async def _respond(writer, status, payload, keep_alive):
+    status = HTTPStatus(status)
+    body = json.dumps(payload).encode("utf-8")
+    writer.write(
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve classify/parse/schedule over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--variants", nargs="+", choices=sorted(ENGINES), default=sorted(ENGINES))
+    parser.add_argument("--max-batch", type=int, default=BATCH_MAX, help="most lines per model call")
+    parser.add_argument("--max-wait-ms", type=float, default=BATCH_WAIT_MS, help="how long a line waits for others to batch with")
+    parser.add_argument("--workers", type=int, help="worker threads for model calls and scheduling")
+    args = parser.parse_args(argv)
+
+    async def run():
+        service = SchedulerService(
+            args.variants, args.max_batch, args.max_wait_ms / 1000,
+            ThreadPoolExecutor(args.workers, thread_name_prefix="scheduler"),
+        )
+        server = await serve(service, args.host, args.port)
+        print(f"Serving on http://{args.host}:{args.port}", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
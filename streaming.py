@@ -0,0 +1,184 @@
+import csv
+import io
+import json
+import os
+import sys
+from bisect import bisect_left
+from itertools import islice
+
+from engine import RosterState
+
+# --- STREAMING ROSTER BUILDS ---
+# Messages are read lazily, classified and parsed a chunk at a time and folded
+# into the columnar store the matching phase runs on; per-line docs, details
+# and intents are dropped after each chunk. Conflicts go straight to a sink and
+# roster rows are written as they are produced, so memory grows by a few int32
+# codes per availability line and requested slot, not by the text of the log.
+# The roster is the one generate_roster builds from the same messages.
+
+CHUNK_SIZE = 1000
+MESSAGE_FIELDS = ("message", "text", "body", "content")
+FORMATS = ("text", "csv", "jsonl")
+EXPORT_FORMATS = ("csv", "parquet")
+EXPORT_BATCH = 65536  # Rows per record batch when writing an Arrow roster
+
+def detect_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv": return "csv"
+    if extension in (".jsonl", ".ndjson"): return "jsonl"
+    return "text"
+
+def _message_field(names):
+    lowered = {name.lower(): name for name in names}
+    for field in MESSAGE_FIELDS:
+        if field in lowered:
+            return lowered[field]
+    return names[0]
+
+def read_messages(handle, fmt="text", field=None):
+    """
+    Yields message strings from an open text handle. CSV and JSONL records use
+    `field`, or the first of message/text/body/content that exists.
+    """
+    if fmt == "text":
+        for line in handle:
+            yield line.rstrip("\r\n")
+
+    elif fmt == "csv":
+        reader = csv.DictReader(handle)
+        if not reader.fieldnames: return
+        column = field or _message_field(reader.fieldnames)
+        for record in reader:
+            yield record.get(column) or ""
+
+    elif fmt == "jsonl":
+        for line in handle:
+            if not line.strip(): continue
+            record = json.loads(line)
+            if isinstance(record, str):
+                yield record
+            else:
+                yield str(record.get(field or _message_field(list(record)), "") or "")
+
+    else:
+        raise ValueError(f"Unknown format {fmt!r}, expected one of {FORMATS}")
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk: return
+        yield chunk
+
+
+class CompactStore(RosterState):
+    """
+    RosterState whose records live in a columnar RosterStore. compact() folds
+    each chunk's availability and requested slots into the store's Tables
+    (int32 codes, minute bounds), so no record dict outlives its chunk and
+    the matching phase runs on those arrays. The name index holds row
+    numbers and preferences are written into the rows. Conflicts are
+    handed to `on_conflict` and not kept.
+    """
+
+    def __init__(self, on_conflict=None):
+        from columnar import RosterStore
+
+        super().__init__()
+        self.on_conflict = on_conflict
+        self.store = RosterStore()
+        self.unavailable = self.store.unavailable  # Blocks go straight to the store
+        self.last_row = None                       # Row of the most recent availability record
+
+    def add_employee(self, emp):
+        # The row the record gets once compact() folds it in
+        row = len(self.store.employees) + len(self.employees)
+        self.employees.append(emp)
+        self.last_row = row
+        if emp["Name"]:
+            self.by_name.setdefault(emp["Name"], []).append(row)
+        return emp
+
+    def prefer(self, name, line):
+        rows = self.by_name.get(name, ()) if name else [self.last_row] if self.last_row is not None else ()
+        # Rows are ascending: folded ones take the code in one assignment, the chunk's dicts the text
+        folded = len(self.store.employees)
+        split = bisect_left(rows, folded)
+        if split:
+            self.store.employees.set(rows[:split], "Preference", line)
+        for row in rows[split:]:
+            self.employees[row - folded]["Preference"] = line
+
+    def compact(self):
+        """Folds what the last sort_lines call appended into the columnar store"""
+        if self.on_conflict:
+            for conflict in self.conflicts:
+                self.on_conflict(conflict)
+        self.conflicts.clear()
+        self.store.employees.extend(self.employees)
+        self.store.shifts.extend(self.shifts)
+        self.employees.clear()
+        self.shifts.clear()
+
+
+def stream_roster(engine, messages, chunk_size=CHUNK_SIZE, on_conflict=None):
+    """
+    Classifies, parses and folds `messages` chunk by chunk, then schedules.
+    Yields roster rows (engine.roster_row) one at a time.
+    """
+    state = CompactStore(on_conflict)
+    with engine.metrics.phase("load_resources"):
+        engine.resources
+
+    for chunk in chunked(messages, chunk_size):
+        lines = engine.split_lines(chunk)
+        if not lines: continue
+        with engine.metrics.phase("parse"):
+            intents, _, parsed = engine.analyze_lines(lines, state.last_person)
+        with engine.metrics.phase("sort"):
+            engine.sort_lines(lines, intents, parsed, state)
+            state.compact()
+
+    state.by_name.clear()
+    roster = engine.schedule_store(state.store)
+    for shift in roster.shifts:
+        yield engine.roster_row(shift)
+
+def write_rows(rows, handle):
+    """Writes roster rows as CSV as they arrive; returns the number written"""
+    writer = None
+    written = 0
+    for row in rows:
+        if writer is None:
+            writer = csv.DictWriter(handle, fieldnames=list(row))
+            writer.writeheader()
+        writer.writerow(row)
+        written += 1
+    return written
+
+def write_table(table, sink, fmt="csv"):
+    """
+    Writes an Arrow roster table (engine.roster_table) to `sink`, a path or
+    binary file, one record batch at a time; returns the number of rows
+    """
+    batches = table.to_batches(EXPORT_BATCH)
+    if fmt == "csv":
+        import pyarrow.csv as pcsv
+
+        with pcsv.CSVWriter(sink, table.schema) as writer:
+            for batch in batches:
+                writer.write_batch(batch)
+    elif fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        with pq.ParquetWriter(sink, table.schema) as writer:
+            for batch in batches:
+                writer.write_batch(batch)
+    else:
+        raise ValueError(f"Unknown export format {fmt!r}, expected one of {EXPORT_FORMATS}")
+    return table.num_rows
+
+def open_input(path, encoding="utf-8"):
+    if path == "-":
+        return io.TextIOWrapper(sys.stdin.buffer, encoding=encoding, newline="")
+    return open(path, encoding=encoding, newline="")
@@ -0,0 +1,134 @@
+import re
+
+from intervals import remove_time_ranges
+
+# --- RULE-BASED FAST PATH FOR TEMPLATED MESSAGES ---
+# "Bob is available Tuesday 3-11 for stock", "We need two cashiers on Friday
+# 9-5", "Dan cannot work on Monday", "Sam prefers mornings": a compiled
+# template gives the intent, a name, a day, a time and a role without the
+# classifier or spaCy. Templates are strict: every word after the opening has
+# to be a day, a time, a role, a head count or a filler word, otherwise the
+# line falls through to the ML/NLP path.
+
+NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+}
+# A number that is a head count: not part of a time ("9am", "at 9 on", "9:30")
+# or a date ("12/25"); time ranges are removed before this runs
+_COUNT = re.compile(
+    rf"(?<![/.:])\b(\d{{1,2}}|{'|'.join(NUMBER_WORDS)})\b"
+    r"(?![/.:]\d)(?!\s*(?:[ap]\.?m\b|o'clock\b|on\b|at\b|to\b|until\b|till\b|and\b|or\b))",
+    re.IGNORECASE,
+)
+
+# Who a head count counts: a role word (the variant's RoleTaxonomy) or one of
+# these, after any number of COUNT_MODIFIERS ("two more cashiers")
+COUNT_NOUNS = {
+    "people", "person", "persons", "staff", "staffers", "worker", "workers",
+    "employee", "employees", "hands", "helper", "helpers",
+}
+COUNT_MODIFIERS = {"more", "extra", "additional", "new", "other"}
+_WORD = re.compile(r"[a-z]+(?:['-][a-z]+)*", re.IGNORECASE)
+
+def find_count(text, roles=None):
+    """
+    The first number in `text` that sits right before a role or people noun
+    ("two cashiers", "3 more people"), as a match of its digits or word; None
+    if there is none. "Room 5 needs a cashier" has no head count.
+    """
+    for found in _COUNT.finditer(text):
+        for word in _WORD.findall(text[found.end():]):
+            word = word.lower()
+            if word in COUNT_NOUNS or (roles is not None and roles.role_of(word) is not None):
+                return found
+            if word not in COUNT_MODIFIERS: break
+    return None
+
+def parse_count(text, roles=None):
+    """Head count of a shift request: 'Need two cashiers' -> 2, 'Shift available 3-11' -> 1"""
+    found = find_count(remove_time_ranges(text), roles)
+    if not found: return 1
+    word = found.group(1).lower()
+    return NUMBER_WORDS[word] if word in NUMBER_WORDS else int(word)
+
+
+WEEKDAY = r"(?:mon|tues|wednes|thurs|fri|satur|sun)day"
+_NAME = r"(?P<name>[A-Z][a-z]+)"
+# Capitalized words that open a sentence without naming anyone
+NOT_NAMES = {"I", "We", "He", "She", "They", "It", "This", "That", "Someone", "Somebody", "Anyone", "Everyone", "Nobody"}
+
+# (intent, opening, rest is free text)
+TEMPLATES = [
+    ("AVAILABILITY", rf"{_NAME} (?i:is (?:also )?(?:available|free)|can (?:only |also )?(?:work|do|cover|take))", False),
+    ("UNAVAILABILITY", rf"{_NAME} (?i:cannot|can't|can not|won't|will not|is (?:unable|not able) to|is (?:not |un)available|isn't available|is (?:sick|away|off))", True),
+    ("SHIFT_REQUEST", r"(?i:(?:we )?(?:need|needs|require|requires|are looking for))", False),
+    ("PREFERENCE", rf"{_NAME} (?i:prefers|would rather|likes)", True),
+]
+FILLER = {
+    "a", "an", "the", "on", "at", "for", "as", "in", "of", "to", "from", "this", "next",
+    "any", "all", "day", "shift", "shifts", "role", "roles", "work", "working",
+    "people", "person", "persons", "staff", "more", "extra", "another", "additional", "new",
+}
+
+
+class FastPath:
+    """
+    Matches lines against TEMPLATES. time_pattern finds the shift time the
+    way the variant's Matcher does; roles (a RoleTaxonomy) names the role
+    words and picks the line's role the way its role extraction does.
+    match() returns (intent, name, day, time, role) or None.
+    """
+
+    def __init__(self, time_pattern, roles):
+        self.templates = [
+            (intent, re.compile(rf"^{opening}\b(?P<rest>.*)$"), free)
+            for intent, opening, free in TEMPLATES
+        ]
+        self.time = re.compile(time_pattern, re.IGNORECASE)
+        self.roles = roles
+        self.day = re.compile(rf"\b{WEEKDAY}\b", re.IGNORECASE)
+
+    def match(self, line):
+        for intent, template, free in self.templates:
+            found = template.match(line)
+            if found is None: continue
+            name = found.groupdict().get("name")
+            if name in NOT_NAMES: return None
+            rest = found.group("rest").strip().rstrip(".!")
+            if free:
+                return self._free(intent, name, rest)
+            return self._strict(intent, name, rest)
+        return None
+
+    def _free(self, intent, name, rest):
+        # Only the name matters downstream; another capitalized word might be
+        # a second person, which is the NLP path's call
+        for word in re.findall(r"\b[A-Z][a-z]*", rest):
+            if not self.day.fullmatch(word):
+                return None
+        days = self.day.findall(rest)
+        times = [found.group(0) for found in self.time.finditer(rest)]
+        return intent, name, days[-1] if days else None, times[-1] if times else None, None
+
+    def _strict(self, intent, name, rest):
+        times = [found.group(0) for found in self.time.finditer(rest)]
+        if len(times) > 1: return None
+        words = re.findall(r"[^\s,]+", self.time.sub(" ", rest))
+        if intent == "SHIFT_REQUEST":
+            count = find_count(" ".join(words), self.roles)
+            if count:
+                words.remove(count.group(1))
+
+        day, roles = None, []
+        for word in words:
+            role = self.roles.role_of(word)
+            if self.day.fullmatch(word):
+                if day: return None
+                day = word
+            elif role is not None:
+                roles.append(role)
+            elif word.lower() not in FILLER:
+                return None
+        role = self.roles.pick(roles) if roles else None
+        return intent, name, day, times[0] if times else None, role
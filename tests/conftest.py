@@ -0,0 +1,10 @@
+import atexit
+import os
+import shutil
+import tempfile
+
+# Trained and corrected models go to a throwaway directory, never the
+# checkout's .artifacts; set before artifacts.py reads it at import time
+ARTIFACT_DIR = tempfile.mkdtemp(prefix="scheduler-artifacts-")
+os.environ["SCHEDULER_ARTIFACT_DIR"] = ARTIFACT_DIR
+atexit.register(shutil.rmtree, ARTIFACT_DIR, ignore_errors=True)
@@ -0,0 +1,33 @@
+import glob
+import os
+
+import pytest
+
+import artifacts
+from engine import ENGINES
+
+LINE = "Quinn would rather swap the Tuesday close"
+
+
+@pytest.mark.parametrize("variant", ["app", "app2"])
+def test_correction_bumps_version_and_reclassifies(variant):
+    engine = ENGINES[variant](parse_cache=None, processes=1)
+    assert artifacts.ARTIFACT_DIR == os.environ["SCHEDULER_ARTIFACT_DIR"]
+    version = engine.resources.version
+    [before], _ = engine.classify_lines([LINE])
+    intent = next(label for label in engine.resources.classifier.classes_ if label != before)
+
+    assert engine.correct_intents([(LINE, intent)]) == version + 1
+    assert engine.resources.version == version + 1
+    assert f"-v{version + 1}-" in engine.model_id
+    assert engine.classify_lines([LINE])[0] == [intent]
+    # The new version is saved where every process looks for it
+    assert glob.glob(os.path.join(artifacts.ARTIFACT_DIR, f"{variant}-*.joblib"))
+
+
+def test_unknown_intent_is_rejected():
+    engine = ENGINES["app"](parse_cache=None, processes=1)
+    version = engine.resources.version
+    with pytest.raises(ValueError, match="Unknown intent 'HOLIDAY'"):
+        engine.correct_intents([(LINE, "HOLIDAY")])
+    assert engine.resources.version == version
@@ -0,0 +1,46 @@
+import pytest
+
+from engine import ENGINES, RosterState
+from incremental import DeltaRoster
+from workload import generate_messages
+
+MESSAGES = [record["message"] for record in generate_messages(300, seed=11)]
+
+def coverage(rows):
+    """(rows, unfilled rows): equal counts mean equal explicit coverage and inferred shifts"""
+    rows = list(rows)
+    return len(rows), sum(row["Employee"] == "UNFILLED" for row in rows)
+
+def full_roster(engine, messages):
+    """One schedule() run over every message, each parsed on its own as DeltaRoster does"""
+    state = RosterState()
+    for message in messages:
+        state.last_person = state.last_employee = None
+        lines = engine.split_lines(message.splitlines())
+        intents, _, parsed = engine.analyze_lines(lines)
+        engine.sort_lines(lines, intents, parsed, state)
+    store = engine.schedule(state.shifts, state.employees, state.unavailable)
+    return engine.roster_rows(store.shifts)
+
+
+@pytest.mark.parametrize("variant", ["app", "app2"])
+def test_delta_coverage_equals_full_matching(variant):
+    engine = ENGINES[variant]("matching", parse_cache=None, processes=1)
+    roster = DeltaRoster(engine)
+    for message_id, message in enumerate(MESSAGES):
+        roster.add_message(message_id, message)
+    assert coverage(roster.rows().values()) == coverage(full_roster(engine, MESSAGES))
+
+    for message_id in range(0, len(MESSAGES), 3):
+        roster.remove_message(message_id)
+    kept = [message for message_id, message in enumerate(MESSAGES) if message_id % 3]
+    assert coverage(roster.rows().values()) == coverage(full_roster(engine, kept))
+
+
+def test_removing_a_message_reports_its_rows():
+    roster = DeltaRoster(ENGINES["app"]("matching", parse_cache=None, processes=1))
+    roster.add_message("bob", "Bob can work Monday 9-5")
+    added = roster.add_message("need", "We need a cashier on Monday 9-5")
+    assert [row["Employee"] for _, row in added.added] == ["Bob"]
+    diff = roster.remove_message("bob")
+    assert [(old["Employee"], new["Employee"]) for _, old, new in diff.changed] == [("Bob", "UNFILLED")]
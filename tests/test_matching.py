@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import maximum_bipartite_matching
+
+from matching import hopcroft_karp, min_cost_assignment
+
+
+def random_graph(seed, n_left, n_right, density):
+    """Adjacency lists of a random bipartite graph and the same graph as a csr matrix"""
+    rng = np.random.default_rng(seed)
+    dense = rng.random((n_left, n_right)) < density
+    adjacency = [np.flatnonzero(row).tolist() for row in dense]
+    return adjacency, csr_matrix(dense)
+
+
+def assert_valid(match, adjacency):
+    """Every matched left vertex uses one of its own edges and no right vertex twice"""
+    used = [v for v in match if v != -1]
+    assert len(used) == len(set(used))
+    for u, v in enumerate(match):
+        assert v == -1 or v in adjacency[u]
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("density", [0.02, 0.1, 0.4])
+def test_hopcroft_karp_size_equals_scipy(seed, density):
+    rng = np.random.default_rng(seed)
+    n_left, n_right = int(rng.integers(1, 80)), int(rng.integers(1, 80))
+    adjacency, graph = random_graph(seed, n_left, n_right, density)
+    match = hopcroft_karp(adjacency, n_right)
+    assert_valid(match, adjacency)
+    expected = maximum_bipartite_matching(graph, perm_type="column")
+    assert sum(v != -1 for v in match) == int((expected != -1).sum())
+
+
+def test_hopcroft_karp_moves_the_greedy_choice():
+    # First-fit gives employee 0 to shift 0 and leaves shift 1 open
+    assert hopcroft_karp([[0, 1], [0]], 2) == [1, 0]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_min_cost_assignment_keeps_maximum_coverage(seed):
+    adjacency, _ = random_graph(seed, 30, 25, 0.08)
+    shifts = [{"Day": "Any", "Role": "Any", "Time": "Any"} for _ in adjacency]
+    employees = [{"Preference": None} for _ in range(25)]
+    match = min_cost_assignment(adjacency, shifts, employees)
+    assert_valid(match, adjacency)
+    assert sum(v != -1 for v in match) == sum(v != -1 for v in hopcroft_karp(adjacency, 25))
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from service import LocalClient, SchedulerService
+
+MESSAGES = ["We need two cashiers on Friday 9-5", "Bob can work Friday 9-5 on the register"]
+
+def call(service, *requests):
+    """Runs (method, path, payload) requests concurrently; returns [(status, payload)]"""
+    client = LocalClient(service)
+
+    async def send(method, path, payload):
+        if method == "GET":
+            return await client.get(path)
+        if isinstance(payload, bytes):
+            return await service.handle(method, path, payload)  # Raw body, as a socket would pass it
+        return await client.post(path, payload)
+
+    async def run():
+        return await asyncio.gather(*(send(*request) for request in requests))
+    return asyncio.run(run())
+
+@pytest.fixture
+def service():
+    return SchedulerService(variants=("app", "app2"), max_wait=0.05, parse_cache=None)
+
+
+@pytest.mark.parametrize("path, payload", [
+    ("/classify", {"lines": MESSAGES}),
+    ("/parse", {"lines": MESSAGES, "variant": "app"}),
+    ("/schedule", {"messages": MESSAGES, "solver": "matching"}),
+])
+def test_valid_requests_return_200(service, path, payload):
+    [(status, body)] = call(service, ("POST", path, payload))
+    assert status == 200
+    assert body["variant"] == payload.get("variant", "app2")
+
+def test_schedule_fills_the_requested_shifts(service):
+    [(status, body)] = call(service, ("POST", "/schedule", {"messages": MESSAGES, "solver": "matching"}))
+    assert status == 200
+    assert [row["Employee"] for row in body["roster"]] == ["Bob", "UNFILLED"]
+
+
+@pytest.mark.parametrize("body", [
+    b"{not json",
+    b"[1, 2]",
+    {"lines": "We need a cashier"},
+    {"lines": [1, 2]},
+    {"lines": MESSAGES, "variant": "app3"},
+])
+def test_malformed_requests_return_400(service, body):
+    [(status, payload)] = call(service, ("POST", "/classify", body))
+    assert status == 400
+    assert "error" in payload
+
+def test_schedule_without_messages_returns_400(service):
+    [(status, _)] = call(service, ("POST", "/schedule", {"lines": MESSAGES}))
+    assert status == 400
+
+def test_unknown_routes(service):
+    assert call(service, ("GET", "/nowhere", None), ("GET", "/classify", None)) == [
+        (404, {"error": "GET /nowhere: Not Found"}),
+        (405, {"error": "GET /classify: Method Not Allowed"}),
+    ]
+
+
+def test_a_burst_of_requests_shares_batches(service):
+    lines = [f"We need {n} cashiers on Friday 9-5" for n in range(2, 42)]
+    responses = call(service, *(("POST", "/classify", {"lines": [line]}) for line in lines))
+    assert all(status == 200 for status, _ in responses)
+    assert [body["results"][0]["line"] for _, body in responses] == lines
+
+    [(status, metrics)] = call(service, ("GET", "/metrics", None))
+    stats = metrics["app2"]["classify_batches"]
+    assert status == 200
+    assert stats["items"] == len(lines)
+    assert stats["batches"] < len(lines)
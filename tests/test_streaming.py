@@ -0,0 +1,43 @@
+import pytest
+
+from engine import ENGINES
+from streaming import stream_roster
+from workload import generate_messages
+
+# Run from the repository root: python -m pytest
+
+MESSAGES = [record["message"] for record in generate_messages(600, seed=7)]
+
+def rosters(variant, solver, messages, chunk_size=50):
+    """(generate_roster rows, stream_roster rows) for the same messages"""
+    engine = ENGINES[variant](solver, parse_cache=None, processes=1)
+    in_memory = engine.roster_rows(engine.generate_roster(messages)[0])
+    streamed = list(stream_roster(ENGINES[variant](solver, parse_cache=None, processes=1), messages, chunk_size))
+    return in_memory, streamed
+
+
+@pytest.mark.parametrize("solver", ["greedy", "matching", "preference"])
+@pytest.mark.parametrize("variant", ["app", "app2"])
+def test_stream_roster_equals_in_memory_roster(variant, solver):
+    in_memory, streamed = rosters(variant, solver, MESSAGES)
+    assert streamed == in_memory
+
+
+def test_nameless_availability_is_not_merged():
+    lines = ["I can work Monday", "I can work Monday", "We need two cashiers on Monday"]
+    in_memory, streamed = rosters("app", "greedy", lines, chunk_size=1)
+    assert streamed == in_memory
+    # Both slots filled, each by one of the nameless senders
+    assert [row["Employee"] for row in streamed] == [None, None]
+
+
+def test_preferences_and_unavailability_reach_every_repeated_record():
+    # One line per chunk: later lines find the earlier records through the name index
+    lines = [
+        "Bob can work Monday 9-5", "Dan can work Monday 9-5", "Bob can work Monday 9-5",
+        "Bob prefers mornings", "Dan cannot work on Monday", "We need two cashiers on Monday 9-5",
+    ]
+    in_memory, streamed = rosters("app", "greedy", lines, chunk_size=1)
+    assert streamed == in_memory
+    assert [row["Employee"] for row in streamed] == ["Bob", "Bob"]
+    assert all(row["Status"] == "✅ MATCHED PREF: Bob prefers mornings" for row in streamed)
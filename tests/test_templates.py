@@ -0,0 +1,36 @@
+import pytest
+
+from roles import load_taxonomy
+from templates import parse_count
+
+APP_ROLES, APP2_ROLES = load_taxonomy("app"), load_taxonomy("app2")
+
+
+@pytest.mark.parametrize("text, count", [
+    ("We need two cashiers for the Friday 9-5 shift.", 2),
+    ("Requires 3 people for inventory", 3),
+    ("We need 4 more people for general help on Monday 9-5", 4),
+    ("Need 2 extra staff on Saturday", 2),
+    ("One server needed", 1),
+    ("Table 12 wants 2 bartenders", 2),
+])
+def test_count_next_to_a_role_or_people_noun(text, count):
+    assert parse_count(text, APP_ROLES) == count
+
+
+@pytest.mark.parametrize("text", [
+    "Room 5 needs a cashier",
+    "Shift available 3-11",
+    "We need 2 on Friday at 9 on the register",
+    "Need a cashier at 9am on 12/25",
+    "Aisle 7 needs restocking",
+])
+def test_other_numbers_are_not_head_counts(text):
+    assert parse_count(text, APP_ROLES) == 1
+
+
+def test_role_words_come_from_the_variant_taxonomy():
+    text = "We need three supervisors on Friday 9am-5pm"
+    assert parse_count(text, APP2_ROLES) == 3
+    # app has no supervisor role, so nothing is counted
+    assert parse_count(text, APP_ROLES) == 1
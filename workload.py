@@ -0,0 +1,115 @@
+import argparse
+import csv
+import json
+import random
+import sys
+
+# --- SYNTHETIC MESSAGE CORPORA ---
+# Seeded staff chat for benchmarks and load tests:
+#     python workload.py --lines 10000 --seed 7 --output corpus.jsonl
+# Every record carries the intent it was generated for, so a corpus doubles
+# as labelled data. The same seed and size always give the same corpus.
+
+NAMES = [
+    "Alice", "Bob", "Claire", "Dan", "Erin", "Frank", "Grace", "Hannah", "Ivan", "Julia",
+    "Kevin", "Laura", "Mike", "Nina", "Oscar", "Priya", "Quinn", "Rosa", "Sam", "Tom",
+]
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+TIMES = ["9-5", "3-11", "9-1", "1-9", "12-8", "7-3", "1 to 9", "9:00-5:00", "9am-5pm", "10pm-6am"]
+ROLES = ["cashier", "stock", "server", "manager", "supervisor", "bartender", "floor", "inventory"]
+COUNTS = ["a", "one", "two", "three", "2", "3", "4"]
+PLURALS = {"stock": "stock", "floor": "floor", "inventory": "inventory"}
+REASONS = [
+    "because of a doctor's appointment", "due to an exam", "because I am sick",
+    "since I'm out of town", "because of a family emergency", "",
+]
+PREFERRED = ["mornings", "evenings", "weekends", "the closing shift", "the early shift", "working alone"]
+
+# (template, share within its intent); templated phrasings come first
+TEMPLATES = {
+    "AVAILABILITY": [
+        ("{name} is available {day} {time} as a {role}", 4),
+        ("{name} is free all day {day}", 2),
+        ("{name} can work {day} {time}", 2),
+        ("{name} can only work {day} {time} as a {role} and {day2} {time2} on the floor", 1),
+        ("I can work {day}", 1),
+        ("Put {name} down for the {day} shift, any role", 1),
+    ],
+    "UNAVAILABILITY": [
+        ("{name} cannot work on {day}", 3),
+        ("{name} cannot work on {day} {reason}", 2),
+        ("{name} has an exam on {day} and cannot work that day", 1),
+        ("I can't make it {day}, sorry", 1),
+    ],
+    "SHIFT_REQUEST": [
+        ("We need {count} {roles} on {day} {time}", 4),
+        ("We need {count} more people for general help on {day} {time}", 1),
+        ("Shift open for {role} {day} {time}", 1),
+        ("Looking for a {role} to cover {day}", 1),
+    ],
+    "PREFERENCE": [
+        ("{name} prefers {preferred}", 3),
+        ("{name} would rather work {day}s", 1),
+        ("I prefer {preferred}", 1),
+    ],
+}
+DEFAULT_MIX = {"AVAILABILITY": 0.4, "UNAVAILABILITY": 0.15, "SHIFT_REQUEST": 0.3, "PREFERENCE": 0.15}
+FORMATS = ("jsonl", "csv", "text")
+
+def _plural(role, count):
+    if count in ("a", "one"): return role
+    return PLURALS.get(role, role + "s")
+
+def generate_messages(lines, seed=0, mix=None, names=NAMES):
+    """Yields {"message", "intent"} records; deterministic for a given seed"""
+    rng = random.Random(seed)
+    mix = mix or DEFAULT_MIX
+    intents = list(mix)
+    intent_weights = [mix[intent] for intent in intents]
+    templates = {intent: [text for text, _ in TEMPLATES[intent]] for intent in intents}
+    template_weights = {intent: [share for _, share in TEMPLATES[intent]] for intent in intents}
+
+    for _ in range(lines):
+        intent = rng.choices(intents, intent_weights)[0]
+        template = rng.choices(templates[intent], template_weights[intent])[0]
+        count = rng.choice(COUNTS)
+        role = rng.choice(ROLES)
+        message = template.format(
+            name=rng.choice(names), day=rng.choice(DAYS), day2=rng.choice(DAYS),
+            time=rng.choice(TIMES), time2=rng.choice(TIMES), role=role, roles=_plural(role, count),
+            count=count, reason=rng.choice(REASONS), preferred=rng.choice(PREFERRED),
+        )
+        yield {"message": " ".join(message.split()), "intent": intent}
+
+def write_corpus(records, handle, fmt="jsonl"):
+    if fmt == "jsonl":
+        for record in records:
+            handle.write(json.dumps(record) + "\n")
+    elif fmt == "csv":
+        writer = csv.DictWriter(handle, fieldnames=["message", "intent"])
+        writer.writeheader()
+        writer.writerows(records)
+    else:
+        for record in records:
+            handle.write(record["message"] + "\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a seeded synthetic staff-message corpus.")
+    parser.add_argument("--lines", "-n", type=int, default=1000, help="number of messages (default: 1000)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed (default: 0)")
+    parser.add_argument("--format", choices=FORMATS, default="jsonl", help="output format (default: jsonl)")
+    parser.add_argument("--output", "-o", default="-", help="output path (default: stdout)")
+    args = parser.parse_args(argv)
+
+    handle = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    try:
+        write_corpus(generate_messages(args.lines, args.seed), handle, args.format)
+    finally:
+        if handle is not sys.stdout:
+            handle.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())